@@ -1,6 +1,8 @@
 """
 Configuration settings for MOPS Financial API
 """
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +14,12 @@ class Settings(BaseSettings):
     request_timeout: float = 30.0
     max_retries: int = 3
     
+    # 靜態 HTML 頁面 (如月營收) 的本地檔案快取目錄，預設停用 (None)。
+    # 請設為絕對路徑 (MOPS_HTML_CACHE_DIR)。月營收已先查 DB 快取，
+    # 此檔案快取只在 DB 無資料或 force_refresh 時才會用到，兩者功能重疊；
+    # 主要用於沒有資料庫的環境 (腳本、開發)。
+    html_cache_dir: Optional[str] = None
+    
     # Database settings - 分離變數，和 docker-compose POSTGRES_* 對齊
     postgres_user: str = "postgres"
     postgres_password: str = "postgres"
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
 from app.db.models import Company, FinancialReport, FinancialFact, MonthlyRevenue as MonthlyRevenueModel
-from app.schemas.financial import FinancialStatement, FinancialItem
+from app.schemas.financial import FinancialStatement, FinancialItem, FINANCIAL_STATEMENT_ADAPTER
 from app.schemas.revenue import MonthlyRevenue as MonthlyRevenueSchema
 
 
@@ -94,7 +94,7 @@ class FinancialRepository:
         
         # 從 full_data 重建 FinancialStatement
         if report.full_data:
-            return FinancialStatement.model_validate(report.full_data)
+            return FINANCIAL_STATEMENT_ADAPTER.validate_python(report.full_data)
         
         # Fallback: 從 facts 重建（如果沒有 full_data）
         return await self._build_statement_from_facts(report)
@@ -35,6 +35,13 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    # Shutdown: Close MOPS HTTP connection pool
+    try:
+        from app.services.mops_html_client import close_mops_html_client
+        await close_mops_html_client()
+    except Exception as e:
+        logger.warning(f"Error closing MOPS HTML client: {e}")
+    
     # Shutdown: Close database connection
     try:
         from app.db import close_db
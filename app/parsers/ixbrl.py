@@ -14,6 +14,12 @@ from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# HTMLParser 會保留命名空間前綴並轉為小寫 (ix:nonFraction -> ix:nonfraction)，
+# 用 tag 名稱交給 root.iter() 在 libxml2 端過濾，不必逐一檢查每個元素
+IX_NONFRACTION_TAGS = ("ix:nonfraction", "nonfraction")
+IX_NONNUMERIC_TAGS = ("ix:nonnumeric", "nonnumeric")
+XBRLI_CONTEXT_TAGS = ("xbrli:context", "context")
+
 
 def replace_schema_refs(content: bytes, schema_mappings: Dict[str, str]) -> bytes:
     """
@@ -72,11 +78,7 @@ def extract_labels_from_html(content: bytes) -> Tuple[Dict[str, str], Dict[str,
         tree = etree.parse(io.BytesIO(content), parser)
         root = tree.getroot()
         
-        for elem in root.iter():
-            tag_lower = str(elem.tag).lower()
-            if 'nonfraction' not in tag_lower:
-                continue
-            
+        for elem in root.iter(*IX_NONFRACTION_TAGS):
             name = elem.get("name", "")
             if not name:
                 continue
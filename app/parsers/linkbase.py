@@ -8,7 +8,7 @@ Linkbase 解析模組
 """
 import io
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 from lxml import etree
 
@@ -16,6 +16,25 @@ from app.schemas.xbrl import CalculationArc, PresentationArc
 
 logger = logging.getLogger(__name__)
 
+LINK_NS = "{http://www.xbrl.org/2003/linkbase}"
+XLINK_NS = "{http://www.w3.org/1999/xlink}"
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+def _iter_elements(content: bytes, tag: str) -> Iterator[etree._Element]:
+    """
+    以 iterparse 串流走訪指定 tag 的元素
+
+    每個元素在 yield 後即清除，並刪除已處理的前方兄弟節點，
+    記憶體用量只與單一 arc 相關，而非整份 linkbase。
+    呼叫端必須在 yield 期間讀完所需屬性與文字。
+    """
+    for _, elem in etree.iterparse(io.BytesIO(content), events=("end",), tag=tag):
+        yield elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
 
 def parse_calculation_linkbase(content: bytes) -> Dict[str, List[CalculationArc]]:
     """
@@ -34,20 +53,15 @@ def parse_calculation_linkbase(content: bytes) -> Dict[str, List[CalculationArc]
     result: Dict[str, List[CalculationArc]] = {}
     
     try:
-        tree = etree.parse(io.BytesIO(content))
-        root = tree.getroot()
-        
         # 找出所有 calculationArc
-        for arc in root.iter("{http://www.xbrl.org/2003/linkbase}calculationArc"):
-            from_attr = arc.get("{http://www.w3.org/1999/xlink}from", "")
-            to_attr = arc.get("{http://www.w3.org/1999/xlink}to", "")
+        for arc in _iter_elements(content, f"{LINK_NS}calculationArc"):
+            from_attr = arc.get(f"{XLINK_NS}from", "")
+            to_attr = arc.get(f"{XLINK_NS}to", "")
             weight = float(arc.get("weight", "1.0"))
             order = float(arc.get("order", "0.0"))
             
             if from_attr:
-                if from_attr not in result:
-                    result[from_attr] = []
-                result[from_attr].append(CalculationArc(
+                result.setdefault(from_attr, []).append(CalculationArc(
                     from_concept=from_attr,
                     to_concept=to_attr,
                     weight=weight,
@@ -58,6 +72,7 @@ def parse_calculation_linkbase(content: bytes) -> Dict[str, List[CalculationArc]
         
     except etree.XMLSyntaxError as e:
         logger.error(f"XML syntax error in calculation linkbase: {e}")
+        result = {}
     
     return result
 
@@ -77,19 +92,14 @@ def parse_presentation_linkbase(content: bytes) -> Dict[str, List[PresentationAr
     result: Dict[str, List[PresentationArc]] = {}
     
     try:
-        tree = etree.parse(io.BytesIO(content))
-        root = tree.getroot()
-        
-        for arc in root.iter("{http://www.xbrl.org/2003/linkbase}presentationArc"):
-            from_attr = arc.get("{http://www.w3.org/1999/xlink}from", "")
-            to_attr = arc.get("{http://www.w3.org/1999/xlink}to", "")
+        for arc in _iter_elements(content, f"{LINK_NS}presentationArc"):
+            from_attr = arc.get(f"{XLINK_NS}from", "")
+            to_attr = arc.get(f"{XLINK_NS}to", "")
             order = float(arc.get("order", "0.0"))
             preferred_label = arc.get("preferredLabel")
             
             if from_attr:
-                if from_attr not in result:
-                    result[from_attr] = []
-                result[from_attr].append(PresentationArc(
+                result.setdefault(from_attr, []).append(PresentationArc(
                     from_concept=from_attr,
                     to_concept=to_attr,
                     order=order,
@@ -100,6 +110,7 @@ def parse_presentation_linkbase(content: bytes) -> Dict[str, List[PresentationAr
         
     except etree.XMLSyntaxError as e:
         logger.error(f"XML syntax error in presentation linkbase: {e}")
+        result = {}
     
     return result
 
@@ -120,16 +131,13 @@ def parse_label_linkbase(content: bytes) -> Tuple[Dict[str, str], Dict[str, str]
     labels_en: Dict[str, str] = {}
     
     try:
-        tree = etree.parse(io.BytesIO(content))
-        root = tree.getroot()
-        
-        for label in root.iter("{http://www.xbrl.org/2003/linkbase}label"):
+        for label in _iter_elements(content, f"{LINK_NS}label"):
             label_text = label.text or ""
-            lang = label.get("{http://www.w3.org/XML/1998/namespace}lang", "")
+            lang = label.get(XML_LANG, "")
             
             # 找對應的 loc 來取得 concept
             # 這裡簡化處理，實際需要透過 labelArc 連結
-            xlink_label = label.get("{http://www.w3.org/1999/xlink}label", "")
+            xlink_label = label.get(f"{XLINK_NS}label", "")
             
             if "zh" in lang.lower() or "tw" in lang.lower():
                 labels_zh[xlink_label] = label_text
@@ -138,5 +146,6 @@ def parse_label_linkbase(content: bytes) -> Tuple[Dict[str, str], Dict[str, str]
                 
     except etree.XMLSyntaxError as e:
         logger.error(f"XML syntax error in label linkbase: {e}")
+        labels_zh, labels_en = {}, {}
     
     return labels_zh, labels_en
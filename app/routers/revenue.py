@@ -13,6 +13,7 @@ from app.services.revenue import (
 from app.schemas.revenue import (
     MonthlyRevenue,
     MarketRevenueResponse,
+    AllMarketsRevenueResponse,
 )
 
 router = APIRouter(prefix="/revenue", tags=["Operations - 營運面"])
@@ -87,6 +88,49 @@ async def get_monthly_revenue(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get(
+    "/markets",
+    response_model=AllMarketsRevenueResponse,
+    summary="取得所有市場月營收",
+    description="並行取得上市、上櫃、興櫃、公開發行四個市場的月營收，失敗的市場列於 failed_markets。"
+)
+async def get_all_markets_monthly_revenue(
+    year: int = Query(..., ge=102, le=200, description="民國年 (e.g., 113)"),
+    month: int = Query(..., ge=1, le=12, description="月份 (1-12)"),
+    force_refresh: bool = Query(False, description="強制從 MOPS 重新爬取，不使用快取"),
+):
+    """
+    取得所有市場月營收
+    
+    各市場並行抓取；個別市場失敗時列於 failed_markets（市場 → 錯誤訊息），
+    全部失敗才回傳 400。
+    """
+    service = get_revenue_service()
+    
+    try:
+        results, failures = await service.get_all_markets_revenue(
+            year, month, force_refresh=force_refresh
+        )
+    except RevenueServiceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return AllMarketsRevenueResponse(
+        year=year,
+        month=month,
+        markets=[
+            MarketRevenueResponse(
+                year=year,
+                month=month,
+                market=market,
+                count=len(data),
+                data=data,
+            )
+            for market, data in results.items()
+        ],
+        failed_markets=failures,
+    )
+
+
 @router.get(
     "/monthly/{stock_id}",
     response_model=MonthlyRevenue,
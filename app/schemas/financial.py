@@ -1,9 +1,9 @@
 """
 Financial data schemas
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from decimal import Decimal
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
 
 
 class FinancialItem(BaseModel):
@@ -58,6 +58,28 @@ class FinancialStatement(BaseModel):
     currency: str = Field("TWD", description="幣別")
     unit: str = Field("thousands", description="單位: thousands (千元) or units (元)")
 
+    @property
+    def concepts(self) -> Dict[str, Optional[Decimal]]:
+        """
+        扁平的 {concept: value} 對照表
+
+        以前序走訪建立，重複的 concept 保留第一次出現的值。
+        每次存取都重新建立 (反映 items 與 model_copy 後的內容)，
+        需多次查詢時請先存成區域變數。
+        """
+        out: Dict[str, Optional[Decimal]] = {}
+        stack = list(reversed(self.items))
+        while stack:
+            item = stack.pop()
+            out.setdefault(item.account_code, item.value)
+            if item.children:
+                stack.extend(reversed(item.children))
+        return out
+
+
+# 共用驗證器：儲存層反序列化時使用 (validate_python / validate_json)
+FINANCIAL_STATEMENT_ADAPTER = TypeAdapter(FinancialStatement)
+
 
 class FinancialQuery(BaseModel):
     """財務報表查詢參數"""
@@ -1,9 +1,11 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Dict, Optional, List
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class MonthlyRevenue(BaseModel):
     """月營收資料模型"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     stock_id: str               # 股票代號
     company_name: str           # 公司名稱
     year: int                   # 民國年
@@ -19,6 +21,10 @@ class MonthlyRevenue(BaseModel):
     comment: Optional[str] = None             # 備註
 
 
+# 共用驗證器：整批月營收一次交給 pydantic-core 驗證
+MONTHLY_REVENUE_LIST_ADAPTER = TypeAdapter(List[MonthlyRevenue])
+
+
 class MarketRevenueResponse(BaseModel):
     """全市場月營收回應"""
     year: int
@@ -26,3 +32,11 @@ class MarketRevenueResponse(BaseModel):
     market: str
     count: int
     data: List[MonthlyRevenue]
+
+
+class AllMarketsRevenueResponse(BaseModel):
+    """所有市場月營收回應"""
+    year: int
+    month: int
+    markets: List[MarketRevenueResponse]
+    failed_markets: Dict[str, str] = {}  # 抓取失敗的市場 → 錯誤訊息
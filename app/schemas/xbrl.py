@@ -3,9 +3,13 @@ XBRL-related schemas
 """
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
+from pydantic.dataclasses import dataclass
 
 
-class CalculationArc(BaseModel):
+# Arc 每份 linkbase 有數千個，改用 slots dataclass：無 __dict__，
+# 單一實例記憶體約為 BaseModel 的 1/4；建立後不可修改
+@dataclass(frozen=True, slots=True)
+class CalculationArc:
     """XBRL Calculation Arc - 定義運算邏輯"""
     from_concept: str = Field(..., description="父節點概念 ID")
     to_concept: str = Field(..., description="子節點概念 ID")
@@ -13,7 +17,8 @@ class CalculationArc(BaseModel):
     order: float = Field(0.0, description="排序順序")
 
 
-class PresentationArc(BaseModel):
+@dataclass(frozen=True, slots=True)
+class PresentationArc:
     """XBRL Presentation Arc - 定義展示階層"""
     from_concept: str = Field(..., description="父節點概念 ID")
     to_concept: str = Field(..., description="子節點概念 ID")
@@ -8,6 +8,7 @@ Fetches and parses disclosure data from MOPS including:
 MOPS AJAX: ajax_t05st11
 """
 import logging
+import re
 from typing import Optional, List
 from decimal import Decimal
 
@@ -29,8 +30,11 @@ from app.services.mops_html_client import (
 
 logger = logging.getLogger(__name__)
 
+# 移除千分位逗號與空白的轉換表 (單次 C 層級掃描)
+_INT_STRIP = str.maketrans("", "", ", ")
 
-
+# 公司名稱 (e.g., "本資料由　(上市公司) 鴻海　公司提供" -> "鴻海")
+_COMPANY_NAME_RE = re.compile(r"\)\s*(.+?)\s*公司")
 
 
 class DisclosureServiceError(Exception):
@@ -118,11 +122,10 @@ class DisclosureService:
         """從表格提取公司名稱"""
         for df in dfs:
             if df.shape[0] > 0:
-                val = str(df.iloc[0, 0])
+                val = str(df.iat[0, 0])
                 if "公司" in val:
                     # 格式: "本資料由　(上市公司) 鴻海　公司提供"
-                    import re
-                    match = re.search(r"\)\s*(.+?)\s*公司", val)
+                    match = _COMPANY_NAME_RE.search(val)
                     if match:
                         return match.group(1)
         return ""
@@ -242,8 +245,25 @@ class DisclosureService:
         return results
     
     def _parse_int(self, value) -> Optional[int]:
-        """Parse integer from string using centralized parser"""
-        d = parse_financial_value(value)
+        """
+        Parse integer from string
+        
+        Plain integers (the common case) go straight to int(); anything
+        else falls back to the centralized parser.
+        """
+        if value is None:
+            return None
+        
+        cleaned = str(value).translate(_INT_STRIP)
+        if cleaned in ("", "-", "—"):
+            return None
+        
+        try:
+            return int(cleaned)
+        except ValueError:
+            pass
+        
+        d = parse_financial_value(cleaned)
         return int(d) if d is not None else None
 
 
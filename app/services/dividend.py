@@ -8,6 +8,7 @@ MOPS AJAX:
 - ajax_t05st09_2: 股利分派情形（含季度） (適用季配息公司如台積電)
 """
 import logging
+import re
 from typing import Optional, List
 from decimal import Decimal
 
@@ -22,8 +23,8 @@ from app.services.mops_html_client import (
 
 logger = logging.getLogger(__name__)
 
-
-
+# 民國年 (e.g., "112年10/01~112年12/31" -> 112)
+_YEAR_RE = re.compile(r"(\d+)年")
 
 
 class DividendServiceError(Exception):
@@ -137,7 +138,7 @@ class DividendService:
         for df in dfs:
             if df.shape[0] == 0:
                 continue
-            val = str(df.iloc[0, 0]) if df.shape[1] > 0 else ""
+            val = str(df.iat[0, 0]) if df.shape[1] > 0 else ""
             if stock_id in val:
                 # 格式通常是 "2330台灣積體電路製造股份有限公司"
                 return val.replace(stock_id, "").strip()
@@ -182,16 +183,11 @@ class DividendService:
                     period_str = str(row[1]) if len(row) > 1 else ""
                     quarter = self._extract_quarter(period_str)
                     
-                    # Helper for float parsing
-                    def _p_float(val):
-                        d = parse_financial_value(val)
-                        return float(d) if d is not None else None
-
                     # 解析現金股利
-                    cash_dividend = _p_float(row[6]) if len(row) > 6 else None
+                    cash_dividend = self._parse_float(row[6]) if len(row) > 6 else None
                     
                     # 解析股票股利
-                    stock_dividend = _p_float(row[7]) if len(row) > 7 else None
+                    stock_dividend = self._parse_float(row[7]) if len(row) > 7 else None
                     
                     # 董事會決議日
                     board_date = str(row[2]).strip() if len(row) > 2 else None
@@ -221,10 +217,14 @@ class DividendService:
 
         return records
     
+    def _parse_float(self, value) -> Optional[float]:
+        """Parse float from string using centralized parser"""
+        d = parse_financial_value(value)
+        return float(d) if d is not None else None
+    
     def _extract_year(self, text: str) -> Optional[int]:
         """提取民國年"""
-        import re
-        match = re.search(r"(\d+)年", text)
+        match = _YEAR_RE.search(text)
         if match:
             return int(match.group(1))
         return None
@@ -149,11 +149,12 @@ class InsidersService:
     
     def _extract_company_name(self, dfs: list, stock_id: str) -> str:
         """從表格中提取公司名稱"""
-        if dfs and len(dfs) > 0:
+        if dfs:
             # 第一個表格通常包含公司代號和名稱
             first_table = dfs[0]
-            if len(first_table) > 0:
-                val = str(first_table.iloc[0, 0])
+            if first_table.shape[0] > 0 and first_table.shape[1] > 0:
+                # iat: 直接取純量，避免 iloc 的索引解析開銷
+                val = str(first_table.iat[0, 0])
                 # 格式通常是 "2330台灣積體電路製造股份有限公司"
                 if val.startswith(stock_id):
                     return val[len(stock_id):]
@@ -176,7 +177,7 @@ class InsidersService:
                 continue
             
             # 找到包含「職稱」和「姓名」的表格
-            first_col = str(df.iloc[0, 0]) if len(df) > 0 else ""
+            first_col = str(df.iat[0, 0]) if len(df) > 0 else ""
             if "職稱" not in first_col and df.shape[0] < 3:
                 continue
             
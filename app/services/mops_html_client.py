@@ -7,22 +7,52 @@ For XBRL financial report downloads, use MOPSXBRLClient instead.
 
 Key Features:
 - Rate limiting to avoid IP ban
+- Shared keep-alive HTTP connection pool
+- Streamed response bodies (status checked before download)
+- Compressed transfers (gzip, or brotli when installed)
+- Optional on-disk cache for static pages
 - Big5/UTF-8 encoding handling
-- pandas.read_html() for table parsing
+- pandas.read_html() (lxml only, table-by-table fallback) for table parsing
 """
 import asyncio
 import logging
+import re
 import time
 from io import StringIO
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 import httpx
 import pandas as pd
+from lxml import etree
 
 from app.config import settings
+from app.utils.cache import FileCache
 
 logger = logging.getLogger(__name__)
 
+# MOPS 查無資料時回傳的提示訊息
+NO_DATA_MARKERS = ("查無資料", "查無符合資料")
+
+# 靜態數值報表 (月營收彙總表) 交給 read_html 在建表時處理千分位與破折號空值
+_STATIC_READ_HTML_OPTIONS: Mapping = MappingProxyType({
+    "thousands": ",",
+    "na_values": ["-", "—"],
+})
+
+# httpx 只在安裝 brotli 時能解 br 壓縮，未安裝時不可宣告支援
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+# 解析前的快速檢查：頁面是否含有任何 <table>
+_TABLE_TAG_RE = re.compile(r"<table[\s>]", re.IGNORECASE)
+
+# lxml 無法解析整頁時，在每個 <table> 前切開逐段重試
+_TABLE_SPLIT_RE = re.compile(r"(?=<table[\s>])", re.IGNORECASE)
+
 
 class MOPSHTMLClientError(Exception):
     """MOPS HTML Client Error (base class)"""
@@ -55,8 +85,9 @@ class MOPSHTMLClient:
     
     Features:
     - Rate limiting (預設 1 req/sec)
+    - 共用 httpx.AsyncClient (keep-alive，避免每次請求重新 TCP/TLS 握手)
     - Big5/UTF-8 編碼處理
-    - 使用 pandas.read_html() 解析表格
+    - 使用 pandas.read_html() (lxml flavor) 解析表格
     """
     
     # Note: mopsov.twse.com.tw is the correct data server
@@ -67,41 +98,175 @@ class MOPSHTMLClient:
     # URL pattern for static monthly revenue HTML
     REVENUE_URL_PATTERN = f"{MOPS_BASE}/nas/t21/{{market}}/t21sc03_{{year}}_{{month}}_{{company_type}}.html"
     
+    # Response body read size when streaming
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
     # Common headers to avoid being blocked
-    DEFAULT_HEADERS = {
+    # Read-only so the default (MOPS_BASE referer) headers can be shared by every request
+    DEFAULT_HEADERS: Mapping[str, str] = MappingProxyType({
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-    }
+        "Accept-Encoding": _ACCEPT_ENCODING,
+        "Referer": MOPS_BASE,
+    })
     
-    def __init__(self, rate_limit: float = 1.0, max_retries: int = 3):
+    def __init__(
+        self,
+        rate_limit: float = 1.0,
+        max_retries: int = 3,
+        cache: Optional[FileCache] = None,
+    ):
         """
         Initialize MOPS HTML Client
         
         Args:
             rate_limit: Minimum seconds between requests (default: 1.0)
             max_retries: Maximum retry attempts for failed requests
+            cache: File cache for static HTML pages (None = no caching)
         """
+        self.cache = cache
         self.rate_limit = rate_limit
         self.max_retries = max_retries
         self._last_request_time: float = 0
+        self._rate_limit_lock = asyncio.Lock()
         self.timeout = getattr(settings, 'request_timeout', 30.0)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _bind_loop(self) -> None:
+        """
+        Tie the HTTP client and rate-limit lock to the running event loop
+        
+        Both are only usable on the loop that first used them. When the
+        client is reused from another loop (tests, scripts calling
+        asyncio.run() more than once), fresh ones are created; the old
+        pool cannot be closed from here and is left to the GC.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            logger.debug("Event loop changed, recreating HTTP client and rate-limit lock")
+            self._client = None
+        self._rate_limit_lock = asyncio.Lock()
+        self._loop = loop
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use in this event loop"""
+        self._bind_loop()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                verify=False,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=16,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client (call at application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
     
     async def _rate_limit_wait(self):
-        """Enforce rate limiting between requests"""
-        now = time.time()
-        wait_time = self.rate_limit - (now - self._last_request_time)
-        if wait_time > 0:
-            logger.debug(f"Rate limiting: waiting {wait_time:.2f}s")
-            await asyncio.sleep(wait_time)
-        self._last_request_time = time.time()
+        """
+        Enforce rate limiting between requests
+        
+        The lock spaces out request *starts* even when several coroutines
+        fetch concurrently; the requests themselves still overlap.
+        """
+        self._bind_loop()
+        async with self._rate_limit_lock:
+            now = time.time()
+            wait_time = self.rate_limit - (now - self._last_request_time)
+            if wait_time > 0:
+                logger.debug(f"Rate limiting: waiting {wait_time:.2f}s")
+                await asyncio.sleep(wait_time)
+            self._last_request_time = time.time()
+    
+    def _get_headers(self, referer: Optional[str] = None) -> Mapping[str, str]:
+        """Get request headers with optional referer (no copy for the default referer)"""
+        if not referer or referer == self.MOPS_BASE:
+            return self.DEFAULT_HEADERS
+        return {**self.DEFAULT_HEADERS, "Referer": referer}
     
-    def _get_headers(self, referer: Optional[str] = None) -> dict:
-        """Get request headers with optional referer"""
-        headers = self.DEFAULT_HEADERS.copy()
-        headers["Referer"] = referer or self.MOPS_BASE
-        return headers
+    async def _stream_text(
+        self,
+        method: str,
+        url: str,
+        encoding: str,
+        **kwargs,
+    ) -> tuple[int, Optional[str]]:
+        """
+        以串流方式送出請求並解碼回應內容
+        
+        先檢查狀態碼，非 200 時不下載內容；
+        200 時分塊讀入 bytearray 後一次解碼，不保留 bytes/str 兩份副本。
+        
+        Returns:
+            (status_code, html_content)，非 200 時 html_content 為 None
+        """
+        client = self._get_client()
+        async with client.stream(method, url, **kwargs) as resp:
+            if resp.status_code != 200:
+                return resp.status_code, None
+            
+            buf = bytearray()
+            async for chunk in resp.aiter_bytes(self.STREAM_CHUNK_SIZE):
+                buf.extend(chunk)
+        
+        return resp.status_code, buf.decode(encoding, errors="replace")
     
+    @staticmethod
+    def _parse_tables(html_content: str, **read_html_kwargs) -> list[pd.DataFrame]:
+        """
+        以 lxml 解析 HTML 中所有表格
+
+        整頁只交給 read_html 建立一次 DOM；lxml 無法解析整頁時才逐表格重試。
+        額外參數 (thousands、na_values 等) 原樣傳給 read_html。
+
+        Raises:
+            ValueError: 找不到任何表格 (與 pd.read_html 行為一致)
+        """
+        # 沒有 <table> 的頁面 (錯誤頁、提示頁) 不必建立 DOM
+        if _TABLE_TAG_RE.search(html_content) is None:
+            raise ValueError("No tables found")
+        
+        try:
+            return pd.read_html(StringIO(html_content), flavor="lxml", **read_html_kwargs)
+        except etree.LxmlError as e:
+            logger.warning(f"lxml failed on full page ({e}), retrying table by table")
+            return MOPSHTMLClient._parse_table_chunks(html_content, **read_html_kwargs)
+
+    @staticmethod
+    def _parse_table_chunks(html_content: str, **read_html_kwargs) -> list[pd.DataFrame]:
+        """
+        逐段解析表格 (整頁解析失敗時的備援)
+
+        在每個 <table> 前切開，各段獨立交給 read_html (仍固定 lxml flavor)，
+        單段損毀只會跳過該段，不影響其他表格。
+
+        Raises:
+            ValueError: 所有段落都解析不出表格
+        """
+        dfs = []
+        for chunk in _TABLE_SPLIT_RE.split(html_content)[1:]:
+            try:
+                dfs.extend(pd.read_html(StringIO(chunk), flavor="lxml", **read_html_kwargs))
+            except (ValueError, etree.LxmlError) as e:
+                logger.debug(f"Skipping unparseable table chunk: {e}")
+                continue
+
+        if not dfs:
+            raise ValueError("No tables found")
+        return dfs
+
     async def fetch_html_table(
         self,
         endpoint: str,
@@ -130,47 +295,42 @@ class MOPSHTMLClient:
         
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(
-                    timeout=self.timeout,
-                    verify=False,
-                    follow_redirects=True,
-                ) as client:
-                    if method.upper() == "POST":
-                        resp = await client.post(
-                            url, 
-                            data=params, 
-                            headers=self._get_headers(url)
-                        )
-                    else:
-                        resp = await client.get(
-                            url, 
-                            params=params, 
-                            headers=self._get_headers(url)
-                        )
-                    
-                    if resp.status_code != 200:
-                        raise MOPSHTMLClientError(
-                            f"HTTP {resp.status_code}", 
-                            resp.status_code
-                        )
-                    
-                    # Set encoding and get text
-                    resp.encoding = encoding
-                    html_content = resp.text
-                    
-                    # Check for "查無資料" (no data found)
-                    if "查無資料" in html_content or "查無符合資料" in html_content:
-                        raise MOPSDataNotFoundError("No data found for the query")
-                    
-                    # Parse HTML tables
-                    try:
-                        dfs = pd.read_html(StringIO(html_content))
-                        logger.info(f"Parsed {len(dfs)} tables from {endpoint}")
-                        return dfs
-                    except ValueError as e:
-                        # pd.read_html raises ValueError when no tables found
-                        raise MOPSParsingError(f"No tables found in response: {e}")
-                    
+                if method.upper() == "POST":
+                    status_code, html_content = await self._stream_text(
+                        "POST",
+                        url,
+                        encoding,
+                        data=params, 
+                        headers=self._get_headers(url)
+                    )
+                else:
+                    status_code, html_content = await self._stream_text(
+                        "GET",
+                        url,
+                        encoding,
+                        params=params, 
+                        headers=self._get_headers(url)
+                    )
+                
+                if status_code != 200:
+                    raise MOPSHTMLClientError(
+                        f"HTTP {status_code}", 
+                        status_code
+                    )
+                
+                # Check for "查無資料" (no data found) before any parsing
+                if any(marker in html_content for marker in NO_DATA_MARKERS):
+                    raise MOPSDataNotFoundError("No data found for the query")
+                
+                # Parse HTML tables
+                try:
+                    dfs = self._parse_tables(html_content)
+                    logger.info(f"Parsed {len(dfs)} tables from {endpoint}")
+                    return dfs
+                except ValueError as e:
+                    # pd.read_html raises ValueError when no tables found
+                    raise MOPSParsingError(f"No tables found in response: {e}")
+                
             except httpx.TimeoutException:
                 logger.warning(f"Timeout attempt {attempt + 1}/{self.max_retries} for {endpoint}")
                 if attempt == self.max_retries - 1:
@@ -190,6 +350,7 @@ class MOPSHTMLClient:
         self,
         url: str,
         encoding: str = "big5",
+        cache_ttl: float = 0,
     ) -> list[pd.DataFrame]:
         """
         抓取靜態 HTML 頁面 (如月營收彙總表)
@@ -197,45 +358,55 @@ class MOPSHTMLClient:
         Args:
             url: 完整的 URL
             encoding: 回應編碼 (通常是 "big5" for 舊頁面)
+            cache_ttl: 本地快取有效秒數 (0 = 不讀快取但仍寫入最新內容,
+                math.inf = 永不過期)；未設定 cache 時忽略
         
         Returns:
-            解析後的 DataFrame 列表
+            解析後的 DataFrame 列表；千分位已去除，"-"/"—" 為 NaN，
+            純數值欄位直接是數值型別
         
         Raises:
             MOPSHTMLClientError: 請求或解析失敗
         """
+        cache_key = f"{url}|{encoding}"
+        if self.cache is not None and cache_ttl > 0:
+            cached = self.cache.get(cache_key, ttl=cache_ttl)
+            if cached is not None:
+                logger.info(f"File cache hit for {url}")
+                try:
+                    return self._parse_tables(cached.decode("utf-8"), **_STATIC_READ_HTML_OPTIONS)
+                except ValueError as e:
+                    raise MOPSParsingError(f"No tables found in response: {e}")
+        
         await self._rate_limit_wait()
         
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(
-                    timeout=self.timeout,
-                    verify=False,
-                    follow_redirects=True,
-                ) as client:
-                    resp = await client.get(url, headers=self._get_headers())
-                    
-                    if resp.status_code == 404:
-                        raise MOPSDataNotFoundError(f"Page not found: {url}")
-                    
-                    if resp.status_code != 200:
-                        raise MOPSHTMLClientError(
-                            f"HTTP {resp.status_code}", 
-                            resp.status_code
-                        )
-                    
-                    # Set encoding and get text
-                    resp.encoding = encoding
-                    html_content = resp.text
-                    
-                    # Parse HTML tables
-                    try:
-                        dfs = pd.read_html(StringIO(html_content))
-                        logger.info(f"Parsed {len(dfs)} tables from static HTML")
-                        return dfs
-                    except ValueError as e:
-                        raise MOPSParsingError(f"No tables found in response: {e}")
-                    
+                status_code, html_content = await self._stream_text(
+                    "GET", url, encoding, headers=self._get_headers()
+                )
+                
+                if status_code == 404:
+                    raise MOPSDataNotFoundError(f"Page not found: {url}")
+                
+                if status_code != 200:
+                    raise MOPSHTMLClientError(
+                        f"HTTP {status_code}", 
+                        status_code
+                    )
+                
+                # Parse HTML tables
+                try:
+                    dfs = self._parse_tables(html_content, **_STATIC_READ_HTML_OPTIONS)
+                    logger.info(f"Parsed {len(dfs)} tables from static HTML")
+                except ValueError as e:
+                    raise MOPSParsingError(f"No tables found in response: {e}")
+                
+                # Only cache pages that parsed, so error pages are refetched
+                if self.cache is not None:
+                    self.cache.set(cache_key, html_content.encode("utf-8"))
+                return dfs
+                
             except httpx.TimeoutException:
                 logger.warning(f"Timeout attempt {attempt + 1}/{self.max_retries}")
                 if attempt == self.max_retries - 1:
@@ -259,5 +430,16 @@ def get_mops_html_client() -> MOPSHTMLClient:
     """Get MOPS HTML client instance (singleton)"""
     global _mops_html_client
     if _mops_html_client is None:
-        _mops_html_client = MOPSHTMLClient()
+        cache = FileCache(settings.html_cache_dir) if settings.html_cache_dir else None
+        _mops_html_client = MOPSHTMLClient(cache=cache)
     return _mops_html_client
+
+
+async def close_mops_html_client():
+    """
+    Close the singleton client's HTTP connections
+    
+    Call this at application shutdown
+    """
+    if _mops_html_client is not None:
+        await _mops_html_client.aclose()
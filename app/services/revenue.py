@@ -8,13 +8,18 @@ https://mopsov.twse.com.tw/nas/t21/{market}/t21sc03_{year}_{month}_{company_type
 
 Note: year uses ROC year (民國年), consistent with other endpoints.
 """
+import asyncio
 import logging
-from typing import Optional, List
+import math
+from typing import Dict, Optional, List, Tuple
 from datetime import date
-from decimal import Decimal
 
-from app.schemas.revenue import MonthlyRevenue
-from app.utils.numerics import parse_financial_value
+import pandas as pd
+
+from pydantic import ValidationError
+
+from app.schemas.revenue import MonthlyRevenue, MONTHLY_REVENUE_LIST_ADAPTER
+from app.utils.numerics import parse_financial_values
 from app.services.mops_html_client import (
     get_mops_html_client,
     MOPSHTMLClient,
@@ -26,8 +31,27 @@ from app.db.repository import RevenueRepository
 
 logger = logging.getLogger(__name__)
 
+# 月營收表格欄位位置
+# columns: 2=revenue, 3=last_month, 4=last_year, 5=mom, 6=yoy, 7=acc, 8=acc_last, 9=acc_yoy, 10=comment
+_INT_COLUMNS = {
+    "revenue": 2,
+    "revenue_last_month": 3,
+    "revenue_last_year": 4,
+    "accumulated_revenue": 7,
+    "accumulated_last_year": 8,
+}
+_FLOAT_COLUMNS = {
+    "mom_change": 5,
+    "yoy_change": 6,
+    "accumulated_yoy_change": 9,
+}
+_NON_STOCK_LABELS = ["合計", "公司代號", "公司", "合計:"]
+_EMPTY_COMMENTS = ["-", "nan", "", "None"]
 
 
+def _none_series(df: pd.DataFrame) -> pd.Series:
+    """與 df 等長、全為 None 的欄位 (表格欄數不足時使用)"""
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
 
 
 class RevenueServiceError(Exception):
@@ -49,6 +73,10 @@ class RevenueService:
     - pub: 公開發行
     """
     
+    # 超過此月數的月營收視為定稿，本地快取永不過期；較新的月份可能仍有更正，快取 1 小時
+    FINAL_AFTER_MONTHS = 6
+    RECENT_CACHE_TTL = 3600
+    
     MARKET_TYPES = {
         "sii": "上市",
         "otc": "上櫃",
@@ -96,7 +124,9 @@ class RevenueService:
                 logger.warning(f"DB query failed, falling back to MOPS: {e}")
         
         # 2. DB 沒有，從 MOPS 爬取
-        revenues = await self._fetch_from_mops(year, month, market, company_type)
+        revenues = await self._fetch_from_mops(
+            year, month, market, company_type, force_refresh=force_refresh
+        )
         
         # 3. 存入 DB
         try:
@@ -109,14 +139,67 @@ class RevenueService:
         
         return revenues
     
+    async def get_all_markets_revenue(
+        self,
+        year: int,  # 民國年
+        month: int,
+        company_type: int = 0,
+        force_refresh: bool = False,
+    ) -> Tuple[Dict[str, List[MonthlyRevenue]], Dict[str, str]]:
+        """
+        並行取得所有市場 (上市/上櫃/興櫃/公開發行) 月營收
+        
+        MOPS 請求間隔仍由 MOPSHTMLClient 統一限速。
+        
+        Args:
+            year: 民國年
+            month: 月份 (1-12)
+            company_type: 公司類型 (0=國內, 1=國外)
+            force_refresh: 強制從 MOPS 重新爬取
+        
+        Returns:
+            ({market: List[MonthlyRevenue]}, {market: 失敗原因})
+        
+        Raises:
+            RevenueServiceError: 所有市場皆失敗
+        """
+        markets = list(self.MARKET_TYPES)
+        results = await asyncio.gather(
+            *(
+                self.get_market_revenue(
+                    year, month, market, company_type, force_refresh=force_refresh
+                )
+                for market in markets
+            ),
+            return_exceptions=True,
+        )
+        
+        revenues: Dict[str, List[MonthlyRevenue]] = {}
+        failures: Dict[str, str] = {}
+        for market, result in zip(markets, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result  # e.g. CancelledError
+                logger.warning(f"Failed to fetch {market} revenue for {year}/{month}: {result}")
+                failures[market] = str(result)
+            else:
+                revenues[market] = result
+        
+        if not revenues:
+            errors = "; ".join(f"{market}: {error}" for market, error in failures.items())
+            raise RevenueServiceError(f"All markets failed for {year}/{month}: {errors}")
+        
+        return revenues, failures
+    
     async def _fetch_from_mops(
         self,
         year: int,
         month: int,
         market: str,
         company_type: int,
+        force_refresh: bool = False,
     ) -> List[MonthlyRevenue]:
-        """從 MOPS 爬取月營收資料"""
+        """從 MOPS 爬取月營收資料 (force_refresh 時略過本地頁面快取)"""
         url = self.client.REVENUE_URL_PATTERN.format(
             market=market,
             year=year,
@@ -127,7 +210,11 @@ class RevenueService:
         logger.info(f"Fetching revenue data from MOPS: {year}/{month} {market}")
         
         try:
-            dfs = await self.client.fetch_static_html(url, encoding="big5")
+            dfs = await self.client.fetch_static_html(
+                url,
+                encoding="big5",
+                cache_ttl=0 if force_refresh else self._cache_ttl(year, month),
+            )
         except MOPSDataNotFoundError:
             raise RevenueServiceError(f"No revenue data for {year}/{month}")
         except MOPSHTMLClientError as e:
@@ -139,6 +226,19 @@ class RevenueService:
         logger.info(f"Parsed {len(revenues)} companies from MOPS {market} {year}/{month}")
         return revenues
     
+    def _cache_ttl(self, year: int, month: int) -> float:
+        """
+        依資料月份決定 MOPS 頁面的本地檔案快取有效秒數 (year 為民國年)
+        
+        只在設定 MOPS_HTML_CACHE_DIR 時生效。get_market_revenue 會先查 DB，
+        因此檔案快取與 DB 快取重疊，僅在 DB 無資料或不可用時才會命中。
+        """
+        today = date.today()
+        age_months = (today.year * 12 + today.month) - ((year + 1911) * 12 + month)
+        if age_months >= self.FINAL_AFTER_MONTHS:
+            return math.inf
+        return self.RECENT_CACHE_TTL
+    
     async def get_single_revenue(
         self,
         stock_id: str,
@@ -195,7 +295,7 @@ class RevenueService:
         - 第一列是標題行（公司代號, 公司名稱, 當月營收, ...）
         - 最後一列通常是「合計」
         """
-        revenues: List[MonthlyRevenue] = []
+        records: List[dict] = []
         
         for i, df in enumerate(dfs):
             # Skip tables that are too small or are headers
@@ -203,8 +303,26 @@ class RevenueService:
                 continue
             
             # Try to parse this table
-            table_revenues = self._parse_single_table(df, year, month)
-            revenues.extend(table_revenues)
+            records.extend(self._parse_single_table(df, year, month))
+        
+        # 整批驗證 (單次 pydantic-core 呼叫)；有錯誤列時退回逐筆驗證並跳過錯誤列
+        try:
+            return MONTHLY_REVENUE_LIST_ADAPTER.validate_python(records)
+        except ValidationError:
+            pass
+        
+        revenues: List[MonthlyRevenue] = []
+        failure_count = 0
+        for record in records:
+            try:
+                revenues.append(MonthlyRevenue.model_validate(record))
+            except ValidationError as e:
+                failure_count += 1
+                if failure_count <= 5: # Limit log noise
+                    logger.warning(f"Invalid revenue row {record.get('stock_id')} for {year}/{month}: {e}")
+        
+        if failure_count > 0:
+            logger.info(f"Skipped {failure_count} invalid revenue rows for {year}/{month}.")
         
         return revenues
     
@@ -213,9 +331,14 @@ class RevenueService:
         df,
         year: int,
         month: int,
-    ) -> List[MonthlyRevenue]:
-        """解析單一產業表格"""
-        revenues = []
+    ) -> List[dict]:
+        """
+        解析單一產業表格為 MonthlyRevenue 欄位 dict (由呼叫端整批驗證)
+
+        以 parse_financial_values 整欄轉換取代逐格 parse_financial_value，
+        數值欄位一次轉換後再逐列組成 dict。
+        """
+        records: List[dict] = []
         
         # The table structure varies, but typically:
         # 公司代號 | 公司名稱 | 當月營收 | 上月營收 | 去年當月營收 | 上月比較增減(%) | 去年同月增減(%) | 當月累計營收 | 去年累計營收 | 前期比較增減(%) | 備註
@@ -224,60 +347,51 @@ class RevenueService:
         
         # Reset column names to numeric index for easier access
         df.columns = range(len(df.columns))
+        n_cols = len(df.columns)
+        
+        # Keep only rows whose first column is a valid stock code (4-6 digits or alphanumeric)
+        stock_ids = df[0].astype(str).str.strip()
+        mask = (
+            (stock_ids.str.len() >= 4)
+            & stock_ids.str.match(r"\d")
+            & ~stock_ids.isin(_NON_STOCK_LABELS)
+        )
+        if not mask.any():
+            return records
+        rows = df[mask]
         
-        for idx, row in df.iterrows():
+        columns = {
+            "stock_id": stock_ids[mask],
+            "company_name": rows[1].astype(str).str.strip() if n_cols > 1 else _none_series(rows),
+        }
+        for field, col in _INT_COLUMNS.items():
+            columns[field] = parse_financial_values(rows[col]) if n_cols > col else _none_series(rows)
+        for field, col in _FLOAT_COLUMNS.items():
+            columns[field] = parse_financial_values(rows[col]) if n_cols > col else _none_series(rows)
+        if n_cols > 10:
+            comments = rows[10].astype(str).str.strip().astype(object)
+            columns["comment"] = comments.where(comments.notna() & ~comments.isin(_EMPTY_COMMENTS), None)
+        else:
+            columns["comment"] = _none_series(rows)
+        
+        fields = list(columns)
+        int_fields = [i for i, f in enumerate(fields) if f in _INT_COLUMNS]
+        float_fields = [i for i, f in enumerate(fields) if f in _FLOAT_COLUMNS]
+        
+        for idx, values in zip(rows.index, zip(*columns.values())):
             try:
-                # Get stock_id from first column
-                stock_id = str(row[0]).strip()
-                
-                # Skip if not a valid stock code (4-6 digits or alphanumeric)
-                if not stock_id or len(stock_id) < 4 or stock_id in ['合計', '公司代號', '公司', '合計:']:
-                    continue
+                values = list(values)
+                for i in int_fields:
+                    v = values[i]
+                    values[i] = None if v is None or v != v else int(v)
+                for i in float_fields:
+                    v = values[i]
+                    values[i] = None if v is None or v != v else float(v)
                 
-                # Check if stock_id starts with a digit
-                if not stock_id[0].isdigit():
-                    continue
-                
-                # Parse company name
-                company_name = str(row[1]).strip() if len(row) > 1 else ""
-                
-                # Helper to parse int/float from Decimal
-                def _p_int(val):
-                    d = parse_financial_value(val)
-                    return int(d) if d is not None else None
-
-                def _p_float(val):
-                    d = parse_financial_value(val)
-                    return float(d) if d is not None else None
-
-                # Parse numeric fields with error handling
-                # columns: 2=revenue, 3=last_month, 4=last_year, 5=mom, 6=yoy, 7=acc, 8=acc_last, 9=acc_yoy
-                revenue = _p_int(row[2]) if len(row) > 2 else None
-                revenue_last_month = _p_int(row[3]) if len(row) > 3 else None
-                revenue_last_year = _p_int(row[4]) if len(row) > 4 else None
-                mom_change = _p_float(row[5]) if len(row) > 5 else None
-                yoy_change = _p_float(row[6]) if len(row) > 6 else None
-                accumulated_revenue = _p_int(row[7]) if len(row) > 7 else None
-                accumulated_last_year = _p_int(row[8]) if len(row) > 8 else None
-                accumulated_yoy_change = _p_float(row[9]) if len(row) > 9 else None
-                
-                comment = str(row[10]).strip() if len(row) > 10 and str(row[10]).strip() not in ['-', 'nan', '', 'None'] else None
-                
-                revenues.append(MonthlyRevenue(
-                    stock_id=stock_id,
-                    company_name=company_name,
-                    year=year,
-                    month=month,
-                    revenue=revenue,
-                    revenue_last_month=revenue_last_month,
-                    revenue_last_year=revenue_last_year,
-                    mom_change=mom_change,
-                    yoy_change=yoy_change,
-                    accumulated_revenue=accumulated_revenue,
-                    accumulated_last_year=accumulated_last_year,
-                    accumulated_yoy_change=accumulated_yoy_change,
-                    comment=comment if comment and comment != 'nan' else None,
-                ))
+                record = dict(zip(fields, values))
+                record["year"] = year
+                record["month"] = month
+                records.append(record)
                 
             except Exception as e:
                 # Log unexpected errors as warning/error instead of debug
@@ -291,7 +405,7 @@ class RevenueService:
         if failure_count > 0:
             logger.info(f"Finished parsing table with {failure_count} failed rows.")
 
-        return revenues
+        return records
     
 
 
@@ -2,11 +2,13 @@
 XBRL Parser using Arelle
 Parses XBRL instance documents and linkbases
 """
+import hashlib
 import io
 import logging
 import tempfile
 import os
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from pathlib import Path
 
 from lxml import etree
@@ -36,6 +38,9 @@ from app.parsers.arelle import (
     extract_labels,
 )
 from app.parsers.ixbrl import (
+    IX_NONFRACTION_TAGS,
+    IX_NONNUMERIC_TAGS,
+    XBRLI_CONTEXT_TAGS,
     replace_schema_refs,
     extract_labels_from_html,
 )
@@ -82,6 +87,63 @@ def _get_schema_mappings() -> dict:
     }
 
 
+# Linkbase / schema 檔名標記，用來排除非 instance 的 .xml
+_NON_INSTANCE_MARKERS = ('_cal', '_pre', '_lab', '_def', '_ref', '.xsd')
+
+
+def _find_instance_filename(filenames: Iterable[str]) -> Optional[str]:
+    """
+    依副檔名分桶，一次走訪找出 Instance 文件
+    
+    優先順序：iXBRL (.htm) > iXBRL (.html) > 傳統 XBRL (.xml，排除 linkbase)，
+    同一類型取 ZIP 中的第一個。
+    """
+    htm: List[str] = []
+    html: List[str] = []
+    xml: List[str] = []
+    for filename in filenames:
+        name = filename.lower()
+        if name.endswith('.htm'):
+            htm.append(filename)
+        elif name.endswith('.html'):
+            html.append(filename)
+        elif name.endswith('.xml') and not any(x in name for x in _NON_INSTANCE_MARKERS):
+            xml.append(filename)
+    
+    for bucket in (htm, html, xml):
+        if bucket:
+            return bucket[0]
+    return None
+
+
+# 判斷檔案格式時檢查的檔頭長度 (iXBRL 的 ix 命名空間宣告在 <html> 標籤上)
+_FORMAT_SNIFF_BYTES = 4096
+
+# Label linkbase 解析結果快取：同一 taxonomy 的 label 檔跨公司、跨季內容相同，
+# 以內容雜湊為 key，只保留雜湊而非原始 bytes
+_LABEL_CACHE_SIZE = 64
+_label_cache: "OrderedDict[bytes, Tuple[Dict[str, str], Dict[str, str]]]" = OrderedDict()
+
+
+def _parse_label_linkbase_cached(content: bytes) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    依內容雜湊快取 label linkbase 解析結果 (LRU)
+
+    回傳字典的複本，呼叫端修改不會污染快取。
+    """
+    key = hashlib.blake2b(content, digest_size=16).digest()
+    cached = _label_cache.get(key)
+    if cached is None:
+        cached = parse_label_linkbase(content)
+        _label_cache[key] = cached
+        if len(_label_cache) > _LABEL_CACHE_SIZE:
+            _label_cache.popitem(last=False)
+    else:
+        _label_cache.move_to_end(key)
+    labels_zh, labels_en = cached
+    return dict(labels_zh), dict(labels_en)
+
+
 class XBRLParserError(Exception):
     """XBRL Parser Error"""
     pass
@@ -195,11 +257,9 @@ class XBRLParser:
             # 1. 提取數值型 Facts (ix:nonFraction)
             # 注意: HTML parser 會將標籤和屬性轉為小寫
             facts = []
-            for elem in root.iter():
-                tag_lower = str(elem.tag).lower()
-                
+            for elem in root.iter(*IX_NONFRACTION_TAGS, *IX_NONNUMERIC_TAGS):
                 # 處理 ix:nonfraction (數值) - 注意小寫
-                if 'nonfraction' in tag_lower:
+                if elem.tag in IX_NONFRACTION_TAGS:
                     name = elem.get("name", "")
                     # HTML parser 轉為小寫: contextref 而非 contextRef
                     context_ref = elem.get("contextref", "") or elem.get("contextRef", "")
@@ -224,7 +284,7 @@ class XBRLParser:
                     ))
                 
                 # 處理 ix:nonnumeric (文字) - 注意小寫
-                elif 'nonnumeric' in tag_lower:
+                else:
                     name = elem.get("name", "")
                     context_ref = elem.get("contextref", "") or elem.get("contextRef", "")
                     
@@ -243,10 +303,9 @@ class XBRLParser:
             
             # 2. 提取 Contexts (在 ix:header > ix:resources 中)
             contexts = {}
-            for ctx in root.iter():
-                if 'context' in str(ctx.tag).lower() and ctx.get("id"):
-                    ctx_id = ctx.get("id", "")
-                    
+            for ctx in root.iter(*XBRLI_CONTEXT_TAGS):
+                ctx_id = ctx.get("id", "")
+                if ctx_id:
                     # 提取 entity
                     entity = ""
                     for id_elem in ctx.iter():
@@ -363,16 +422,35 @@ class XBRLParser:
         Returns:
             XBRLPackage
         """
-        # 判斷格式
-        if content[:2] == b"PK":
-            # ZIP 格式
+        fmt = self._detect_format(content)
+        if fmt == "zip":
             return self.parse_zip(content, stock_id, year, quarter)
-        elif b"ix:nonFraction" in content or b"ix:nonNumeric" in content:
-            # iXBRL 格式
+        elif fmt == "ixbrl":
             return self.parse_ixbrl(content, stock_id, year, quarter)
         else:
             raise XBRLParserError("Unknown file format - expected ZIP or iXBRL HTML")
     
+    def _detect_format(self, content: bytes) -> str:
+        """
+        以檔頭判斷格式，不做任何解析嘗試
+        
+        - ZIP: 開頭為 PK magic bytes
+        - iXBRL: 檔頭宣告 ix 命名空間或出現 ix: 標籤；
+          檔頭看不出來時才掃描全文找 ix:nonFraction / ix:nonNumeric
+        
+        Returns:
+            "zip"、"ixbrl" 或 "unknown"
+        """
+        if content[:2] == b"PK":
+            return "zip"
+        
+        head = content[:_FORMAT_SNIFF_BYTES].lower()
+        if b"xmlns:ix=" in head or b"<ix:" in head:
+            return "ixbrl"
+        if b"ix:nonFraction" in content or b"ix:nonNumeric" in content:
+            return "ixbrl"
+        return "unknown"
+    
     def _parse_with_arelle(
         self, 
         files: Dict[str, bytes], 
@@ -458,16 +536,7 @@ class XBRLParser:
     
     def _find_instance_file(self, files: Dict[str, bytes]) -> Optional[str]:
         """找出 Instance 文件"""
-        for filename in files.keys():
-            # iXBRL 格式 (.htm/.html)
-            if filename.endswith(('.htm', '.html')):
-                return filename
-            # 傳統 XBRL 格式 (.xml)
-            if filename.endswith('.xml') and not any(
-                x in filename.lower() for x in ['_cal', '_pre', '_lab', '_def', '_ref', '.xsd']
-            ):
-                return filename
-        return None
+        return _find_instance_filename(files)
     
     def _parse_calculation_linkbase(self, content: bytes) -> Dict[str, List[CalculationArc]]:
         """
@@ -481,8 +550,8 @@ class XBRLParser:
         return parse_presentation_linkbase(content)
     
     def _parse_label_linkbase(self, content: bytes) -> tuple[Dict[str, str], Dict[str, str]]:
-        """解析 Label Linkbase XML"""
-        return parse_label_linkbase(content)
+        """解析 Label Linkbase XML (相同內容只解析一次)"""
+        return _parse_label_linkbase_cached(content)
     
     def _parse_instance_facts(self, content: bytes) -> List[XBRLFact]:
         """解析 Instance Document 中的 facts"""
@@ -1,4 +1,5 @@
 """Utility modules for mops-financial-api"""
-from app.utils.numerics import parse_financial_value, is_numeric_string
+from app.utils.numerics import parse_financial_value, parse_financial_values, is_numeric_string
+from app.utils.cache import FileCache
 
-__all__ = ["parse_financial_value", "is_numeric_string"]
+__all__ = ["parse_financial_value", "parse_financial_values", "is_numeric_string", "FileCache"]
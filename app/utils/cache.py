@@ -0,0 +1,76 @@
+"""
+File-based cache for downloaded pages
+
+Stores gzip-compressed payloads under a cache directory, one file per key.
+Freshness is checked against the file's mtime at read time, so the same
+entry can be read with different TTLs (e.g. long for closed periods,
+short for the current month).
+"""
+import gzip
+import hashlib
+import logging
+import math
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class FileCache:
+    """
+    檔案快取
+
+    key 以 blake2b 雜湊為檔名，內容以 gzip 壓縮存放。
+    寫入先寫暫存檔再 os.replace，讀取端不會看到寫到一半的檔案。
+    """
+
+    SUFFIX = ".gz"
+
+    def __init__(self, directory: Union[str, Path], compresslevel: int = 6):
+        self.directory = Path(directory)
+        self.compresslevel = compresslevel
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return self.directory / f"{digest}{self.SUFFIX}"
+
+    def get(self, key: str, ttl: float = math.inf) -> Optional[bytes]:
+        """
+        讀取快取
+
+        Args:
+            key: 快取鍵 (通常是 URL)
+            ttl: 有效秒數，math.inf 表示永不過期
+
+        Returns:
+            快取內容，不存在、過期或毀損時返回 None
+        """
+        path = self._path(key)
+        try:
+            if ttl != math.inf and time.time() - path.stat().st_mtime > ttl:
+                return None
+            return gzip.decompress(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """寫入快取 (失敗只記錄警告，不影響呼叫端)"""
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=self.compresslevel))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {path.name}: {e}")
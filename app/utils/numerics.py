@@ -7,13 +7,20 @@ Provides consistent handling of financial value strings:
 - Empty/dash values
 - Negative numbers and decimals
 """
+import re
 from decimal import Decimal, InvalidOperation
-from typing import Optional
+from typing import Iterable, Optional, Union
 
+import numpy as np
+import pandas as pd
 
-def parse_financial_value(value_str: Optional[str]) -> Optional[Decimal]:
+# 可選負號 + 數字，最多一個小數點且至少一位數字 (如 "-1234", "123.45", ".5")
+_NUMERIC_MATCH = re.compile(r"-*(?:\d+\.?\d*|\.\d+)").fullmatch
+
+
+def parse_financial_value(value_str: Optional[str]) -> Optional[Union[int, Decimal]]:
     """
-    解析財報數值字串為 Decimal
+    解析財報數值字串
     
     處理：
     - 逗號分隔符 (e.g., "1,234,567")
@@ -22,15 +29,19 @@ def parse_financial_value(value_str: Optional[str]) -> Optional[Decimal]:
     - 負數 (e.g., "-1234")
     - 小數 (e.g., "123.45")
     
+    財報數值絕大多數是整數，純 ASCII 且無小數點時直接以 int() 解析 (快速路徑)，
+    其餘 (小數、全形數字等) 交給 Decimal 解析。
+    int 與 Decimal 可直接比較與運算，呼叫端無需區分。
+    
     Args:
         value_str: 原始數值字串
         
     Returns:
-        Decimal 值，若無法解析則返回 None
+        int (整數) 或 Decimal (小數)，若無法解析則返回 None
         
     Examples:
         >>> parse_financial_value("1,234,567")
-        Decimal('1234567')
+        1234567
         >>> parse_financial_value("-1,234.56")
         Decimal('-1234.56')
         >>> parse_financial_value("")
@@ -42,12 +53,21 @@ def parse_financial_value(value_str: Optional[str]) -> Optional[Decimal]:
         return None
     
     # 清理字串
-    cleaned = str(value_str).replace(",", "").strip()
+    if type(value_str) is not str:
+        value_str = str(value_str)
+    cleaned = value_str.replace(",", "").strip()
     
     # 空值檢查 (包含半形和全形破折號)
-    if not cleaned or cleaned in ("-", "—", ""):
+    if not cleaned or cleaned in ("-", "—"):
         return None
     
+    # 快速路徑：ASCII 整數
+    if "." not in cleaned and cleaned.isascii():
+        try:
+            return int(cleaned)
+        except ValueError:
+            pass
+    
     # 嘗試轉換
     try:
         return Decimal(cleaned)
@@ -55,6 +75,38 @@ def parse_financial_value(value_str: Optional[str]) -> Optional[Decimal]:
         return None
 
 
+def parse_financial_values(values: Iterable) -> np.ndarray:
+    """
+    批次解析財報數值字串為 float64 陣列
+    
+    parse_financial_value 的整欄版本：去除逗號與空白後一次交給
+    pandas/NumPy 的 C 迴圈轉換，避免逐格呼叫 Python 函式與建立 Decimal。
+    適用於全市場表格等大量欄位；需要精確小數時請使用 parse_financial_value。
+    
+    Args:
+        values: 原始數值 (字串、數字或 None 的序列 / pandas Series)
+        
+    Returns:
+        float64 陣列，無法解析 (空值/破折號/文字) 者為 NaN。
+        |x| < 2**53 的整數可精確表示，足以涵蓋千元單位的財報數字。
+        
+    Examples:
+        >>> parse_financial_values(["1,234", "-", "12"])
+        array([1234.,   nan,   12.])
+    """
+    # read_html 已轉好的數值欄位 (int/float dtype) 不必再經過字串清理
+    if isinstance(values, pd.Series) and values.dtype.kind in "iuf":
+        return values.to_numpy(dtype=np.float64)
+    
+    cleaned = (
+        pd.Series(values, dtype=object)
+        .astype(str)
+        .str.replace(",", "", regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype=np.float64)
+
+
 def is_numeric_string(value_str: Optional[str]) -> bool:
     """
     檢查字串是否為有效的數值
@@ -79,13 +131,6 @@ def is_numeric_string(value_str: Optional[str]) -> bool:
     if value_str is None:
         return False
     
-    cleaned = str(value_str).replace(",", "").strip()
-    if not cleaned or cleaned in ("-", "—"):
-        return False
-    
-    # 支援負數和小數：移除負號，僅允許一個小數點
-    test_str = cleaned.lstrip('-')
-    if test_str.count('.') > 1:
-        return False
-    
-    return test_str.replace('.', '', 1).isdigit()
+    if type(value_str) is not str:
+        value_str = str(value_str)
+    return _NUMERIC_MATCH(value_str.replace(",", "").strip()) is not None
@@ -0,0 +1,34 @@
+"""
+Shared pytest fixtures
+"""
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """
+    One TestClient for the whole test session
+
+    Not entered as a context manager on purpose: the app lifespan downloads
+    taxonomies and connects to PostgreSQL, which API tests don't need.
+    """
+    return TestClient(app)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client():
+    """
+    One in-process async HTTP client for the whole test session
+
+    Requests go straight to the ASGI app on the test's event loop, without
+    TestClient's per-request thread/portal hop. Like `client`, lifespan
+    events are not run.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
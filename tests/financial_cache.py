@@ -0,0 +1,96 @@
+"""
+Financial Statement Cache - 測試用財報行程內快取
+
+Test-only LRU cache in front of FinancialService.get_financial_statement.
+
+The accounting-equation tests query the same (stock_id, year, quarter,
+report_type, format) tuples several times; within one pytest process a
+repeat skips both the DB cache lookup and the MOPS download. The API keeps
+using FinancialService directly, whose DB cache is the production cache.
+Entries are stored as model objects and deep-copied on the way in and
+out, so callers can freely mutate the returned statement without
+corrupting the cache, and a hit is identical to a miss (Decimal values
+keep full precision).
+"""
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.schemas.financial import FinancialStatement
+from app.services.financial import FinancialService, get_financial_service
+
+logger = logging.getLogger(__name__)
+
+
+CacheKey = Tuple[str, int, Optional[int], str, str]
+
+
+class CachedFinancialService:
+    """
+    帶行程內 LRU 快取的財報服務（僅供測試使用）
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, service: Optional[FinancialService] = None):
+        self.service = service or get_financial_service()
+        self._cache: "OrderedDict[CacheKey, FinancialStatement]" = OrderedDict()
+
+    async def get_financial_statement(
+        self,
+        stock_id: str,
+        year: int,
+        quarter: Optional[int] = None,
+        report_type: str = "balance_sheet",
+        format: str = "tree",
+    ) -> FinancialStatement:
+        """
+        取得財務報表（優先從行程內快取讀取）
+
+        Args:
+            stock_id: 股票代號
+            year: 民國年
+            quarter: 季度 (1-4)，若為 None 則取年報原始資料
+            report_type: balance_sheet, income_statement, cash_flow
+            format: tree (階層) 或 flat (扁平)
+
+        Returns:
+            FinancialStatement (每次呼叫皆為獨立物件)
+        """
+        key = (stock_id, year, quarter, report_type, format)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            logger.debug(f"Process cache hit for {key}")
+            return cached.model_copy(deep=True)
+
+        statement = await self.service.get_financial_statement(
+            stock_id=stock_id,
+            year=year,
+            quarter=quarter,
+            report_type=report_type,
+            format=format,
+        )
+
+        self._cache[key] = statement.model_copy(deep=True)
+        if len(self._cache) > self.MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+        return statement
+
+    def clear(self) -> None:
+        """清除所有快取"""
+        self._cache.clear()
+
+
+# Singleton instance
+_cached_financial_service: Optional[CachedFinancialService] = None
+
+
+def get_cached_financial_service() -> CachedFinancialService:
+    """Get cached financial service instance (singleton)"""
+    global _cached_financial_service
+    if _cached_financial_service is None:
+        _cached_financial_service = CachedFinancialService()
+    return _cached_financial_service
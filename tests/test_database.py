@@ -3,32 +3,24 @@ Database Tests
 
 Tests for FinancialRepository using SQLite in-memory database.
 """
-import json
 import pytest
+import pytest_asyncio
 from decimal import Decimal
 from typing import AsyncGenerator
 
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Boolean, ForeignKey, JSON, select, func
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import (
+    event, Column, String, Integer, Numeric, DateTime, Boolean, ForeignKey, JSON,
+    UniqueConstraint, select, func, delete, insert,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.pool import StaticPool
 
-from app.schemas.financial import FinancialStatement, FinancialItem
+from app.schemas.financial import FinancialStatement, FinancialItem, FINANCIAL_STATEMENT_ADAPTER
 
 
-# ==============================================================================
-# Helper: Custom JSON encoder for Decimal
-# ==============================================================================
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
-
-
-def serialize_for_json(data: dict) -> dict:
-    """Convert Decimal values to float for JSON storage"""
-    return json.loads(json.dumps(data, cls=DecimalEncoder))
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
 
 # ==============================================================================
@@ -70,6 +62,10 @@ class DBFinancialReport(DBBase):
     
     company = relationship("DBCompany", back_populates="reports")
     facts = relationship("DBFinancialFact", back_populates="report", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        UniqueConstraint("stock_id", "year", "quarter", "report_type", name="uq_report_identity"),
+    )
 
 
 class DBFinancialFact(DBBase):
@@ -131,43 +127,38 @@ class InMemoryFinancialRepository:
             name=statement.company_name or f"Company {statement.stock_id}",
         )
         
-        # Check if report exists
-        result = await self.session.execute(
-            select(DBFinancialReport).where(
-                DBFinancialReport.stock_id == statement.stock_id,
-                DBFinancialReport.year == statement.year,
-                DBFinancialReport.quarter == statement.quarter,
-                DBFinancialReport.report_type == statement.report_type,
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        # Serialize with Decimal handling
-        full_data = serialize_for_json(statement.model_dump())
+        # JSON-mode dump yields primitives ready for the JSON column
+        full_data = statement.model_dump(mode="json")
         
-        if existing:
-            existing.full_data = full_data
-            report = existing
-        else:
-            report = DBFinancialReport(
-                stock_id=statement.stock_id,
-                year=statement.year,
-                quarter=statement.quarter or 4,
-                report_type=statement.report_type,
-                full_data=full_data,
-                is_standalone=statement.is_standalone,
-            )
-            self.session.add(report)
+        # Upsert report in a single statement
+        stmt = sqlite_insert(DBFinancialReport).values(
+            stock_id=statement.stock_id,
+            year=statement.year,
+            quarter=statement.quarter or 4,
+            report_type=statement.report_type,
+            full_data=full_data,
+            is_standalone=statement.is_standalone,
+        ).on_conflict_do_update(
+            index_elements=["stock_id", "year", "quarter", "report_type"],
+            set_={
+                "full_data": full_data,
+                "is_standalone": statement.is_standalone,
+            }
+        ).returning(DBFinancialReport.id)
         
-        await self.session.flush()
+        result = await self.session.execute(stmt)
+        report_id = result.scalar_one()
         
-        # Save facts
-        facts = self._extract_facts(statement.items, report.id)
-        for fact in facts:
-            self.session.add(fact)
+        # Replace facts
+        await self.session.execute(
+            delete(DBFinancialFact).where(DBFinancialFact.report_id == report_id)
+        )
+        facts = self._extract_facts(statement.items, report_id)
+        if facts:
+            await self.session.execute(insert(DBFinancialFact), facts)
         
         await self.session.commit()
-        return report.id
+        return report_id
     
     async def get_report(
         self,
@@ -190,7 +181,7 @@ class InMemoryFinancialRepository:
         if not report or not report.full_data:
             return None
         
-        return FinancialStatement.model_validate(report.full_data)
+        return FINANCIAL_STATEMENT_ADAPTER.validate_python(report.full_data)
     
     async def report_exists(
         self,
@@ -210,20 +201,19 @@ class InMemoryFinancialRepository:
         )
         return result.scalar() > 0
     
-    def _extract_facts(self, items: list[FinancialItem], report_id: int) -> list[DBFinancialFact]:
+    def _extract_facts(self, items: list[FinancialItem], report_id: int) -> list[dict]:
         """提取 facts"""
         facts = []
         for item in items:
-            fact = DBFinancialFact(
-                report_id=report_id,
-                concept=item.account_code,
-                label_zh=item.account_name,
-                label_en=item.account_name_en,
-                value=item.value,
-                level=item.level,
-                weight=Decimal(str(item.weight)),
-            )
-            facts.append(fact)
+            facts.append({
+                "report_id": report_id,
+                "concept": item.account_code,
+                "label_zh": item.account_name,
+                "label_en": item.account_name_en,
+                "value": item.value,
+                "level": item.level,
+                "weight": Decimal(str(item.weight)),
+            })
             facts.extend(self._extract_facts(item.children, report_id))
         return facts
 
@@ -232,13 +222,27 @@ class InMemoryFinancialRepository:
 # Fixtures
 # ==============================================================================
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def db_engine():
-    """Create in-memory SQLite engine"""
+    """Create in-memory SQLite engine and schema once per test session"""
+    # :memory: databases live per connection, so pin every checkout to one connection
     engine = create_async_engine(
         "sqlite+aiosqlite:///:memory:",
         echo=False,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
     )
+
+    # pysqlite never emits BEGIN itself, so SAVEPOINT/ROLLBACK would be no-ops;
+    # take over transaction control (SQLAlchemy's documented pysqlite recipe)
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(DBBase.metadata.create_all)
     
@@ -247,15 +251,27 @@ async def db_engine():
     await engine.dispose()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(loop_scope="session")
 async def db_session(db_engine) -> AsyncGenerator[AsyncSession, None]:
-    """Create test session"""
-    async_session = async_sessionmaker(db_engine, expire_on_commit=False)
-    async with async_session() as session:
+    """
+    Create test session joined to an outer transaction
+    
+    Repository commits only release a SAVEPOINT; the outer transaction is
+    rolled back on teardown so every test starts from empty tables.
+    """
+    async with db_engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
         yield session
+        await session.close()
+        await trans.rollback()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(loop_scope="session")
 async def repo(db_session) -> InMemoryFinancialRepository:
     """Create test repository"""
     return InMemoryFinancialRepository(db_session)
@@ -265,46 +281,45 @@ async def repo(db_session) -> InMemoryFinancialRepository:
 # Sample Data
 # ==============================================================================
 
-def create_sample_statement() -> FinancialStatement:
-    """Create a sample financial statement for testing"""
-    return FinancialStatement(
-        stock_id="2330",
-        company_name="台積電",
-        year=113,
-        quarter=3,
-        report_type="balance_sheet",
-        is_standalone=False,
-        items=[
-            FinancialItem(
-                account_code="Assets",
-                account_name="資產總計",
-                account_name_en="Total Assets",
-                value=Decimal("1000000"),
-                weight=1.0,
-                level=0,
-                children=[
-                    FinancialItem(
-                        account_code="CurrentAssets",
-                        account_name="流動資產",
-                        account_name_en="Current Assets",
-                        value=Decimal("400000"),
-                        weight=1.0,
-                        level=1,
-                        children=[],
-                    ),
-                    FinancialItem(
-                        account_code="NonCurrentAssets",
-                        account_name="非流動資產",
-                        account_name_en="Non-current Assets",
-                        value=Decimal("600000"),
-                        weight=1.0,
-                        level=1,
-                        children=[],
-                    ),
-                ],
-            ),
-        ],
-    )
+# Built once at import; tests that mutate it must take a deep copy
+SAMPLE_STATEMENT = FinancialStatement(
+    stock_id="2330",
+    company_name="台積電",
+    year=113,
+    quarter=3,
+    report_type="balance_sheet",
+    is_standalone=False,
+    items=[
+        FinancialItem(
+            account_code="Assets",
+            account_name="資產總計",
+            account_name_en="Total Assets",
+            value=Decimal("1000000"),
+            weight=1.0,
+            level=0,
+            children=[
+                FinancialItem(
+                    account_code="CurrentAssets",
+                    account_name="流動資產",
+                    account_name_en="Current Assets",
+                    value=Decimal("400000"),
+                    weight=1.0,
+                    level=1,
+                    children=[],
+                ),
+                FinancialItem(
+                    account_code="NonCurrentAssets",
+                    account_name="非流動資產",
+                    account_name_en="Non-current Assets",
+                    value=Decimal("600000"),
+                    weight=1.0,
+                    level=1,
+                    children=[],
+                ),
+            ],
+        ),
+    ],
+)
 
 
 # ==============================================================================
@@ -314,20 +329,18 @@ def create_sample_statement() -> FinancialStatement:
 class TestRepositorySaveAndGet:
     """Test save and retrieve operations"""
     
-    @pytest.mark.asyncio
     async def test_save_report(self, repo):
         """Test saving a report"""
-        statement = create_sample_statement()
+        statement = SAMPLE_STATEMENT
         
         report_id = await repo.save_report(statement)
         
         assert report_id is not None
         assert report_id > 0
     
-    @pytest.mark.asyncio
     async def test_get_report_after_save(self, repo):
         """Test retrieving a saved report"""
-        statement = create_sample_statement()
+        statement = SAMPLE_STATEMENT
         await repo.save_report(statement)
         
         retrieved = await repo.get_report(
@@ -343,7 +356,6 @@ class TestRepositorySaveAndGet:
         assert retrieved.quarter == 3
         assert retrieved.report_type == "balance_sheet"
     
-    @pytest.mark.asyncio
     async def test_get_nonexistent_report(self, repo):
         """Test retrieving a report that doesn't exist"""
         retrieved = await repo.get_report(
@@ -355,10 +367,9 @@ class TestRepositorySaveAndGet:
         
         assert retrieved is None
     
-    @pytest.mark.asyncio
     async def test_report_exists_true(self, repo):
         """Test report_exists returns True for existing report"""
-        statement = create_sample_statement()
+        statement = SAMPLE_STATEMENT
         await repo.save_report(statement)
         
         exists = await repo.report_exists(
@@ -370,7 +381,6 @@ class TestRepositorySaveAndGet:
         
         assert exists is True
     
-    @pytest.mark.asyncio
     async def test_report_exists_false(self, repo):
         """Test report_exists returns False for non-existing report"""
         exists = await repo.report_exists(
@@ -386,11 +396,10 @@ class TestRepositorySaveAndGet:
 class TestRepositoryUpdate:
     """Test update operations"""
     
-    @pytest.mark.asyncio
     async def test_update_existing_report(self, repo):
         """Test updating an existing report"""
         # Save initial version
-        statement = create_sample_statement()
+        statement = SAMPLE_STATEMENT.model_copy(deep=True)
         await repo.save_report(statement)
         
         # Update with new data
@@ -406,14 +415,41 @@ class TestRepositoryUpdate:
         )
         
         assert retrieved is not None
-        # Note: value is stored as float in JSON, so compare as float
-        assert float(retrieved.items[0].value) == 2000000.0
+        assert retrieved.items[0].value == Decimal("2000000")
+    
+    async def test_high_precision_value_round_trips(self, repo):
+        """Test Decimal values survive the JSON column without float rounding"""
+        statement = SAMPLE_STATEMENT.model_copy(deep=True)
+        statement.items[0].value = Decimal("12345678901234567.89")
+        await repo.save_report(statement)
+        
+        retrieved = await repo.get_report(
+            stock_id="2330",
+            year=113,
+            quarter=3,
+            report_type="balance_sheet",
+        )
+        
+        assert retrieved.items[0].value == Decimal("12345678901234567.89")
+    
+    async def test_resave_replaces_facts(self, repo, db_session):
+        """Test saving the same report twice keeps one report and one set of facts"""
+        statement = SAMPLE_STATEMENT
+        first_id = await repo.save_report(statement)
+        second_id = await repo.save_report(statement)
+        
+        assert first_id == second_id
+        
+        report_count = await db_session.scalar(select(func.count()).select_from(DBFinancialReport))
+        fact_count = await db_session.scalar(select(func.count()).select_from(DBFinancialFact))
+        
+        assert report_count == 1
+        assert fact_count == 3
 
 
 class TestRepositoryCompany:
     """Test company operations"""
     
-    @pytest.mark.asyncio
     async def test_upsert_company_create(self, repo):
         """Test creating a new company"""
         company = await repo.upsert_company(
@@ -425,7 +461,6 @@ class TestRepositoryCompany:
         assert company.stock_id == "2330"
         assert company.name == "台積電"
     
-    @pytest.mark.asyncio
     async def test_upsert_company_update(self, repo):
         """Test updating an existing company"""
         # Create
@@ -440,3 +475,13 @@ class TestRepositoryCompany:
         
         assert company.name == "台灣積體電路製造"
         assert company.name_en == "Taiwan Semiconductor"
+
+
+class TestSessionIsolation:
+    """Test per-test rollback of repository commits"""
+    
+    async def test_tables_empty_after_earlier_commits(self, db_session):
+        """Rows committed by earlier tests must not leak into this one"""
+        for model in (DBCompany, DBFinancialReport, DBFinancialFact):
+            count = await db_session.scalar(select(func.count()).select_from(model))
+            assert count == 0
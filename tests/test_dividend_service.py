@@ -2,6 +2,7 @@
 Tests for Dividend Service
 """
 import pytest
+from pydantic import TypeAdapter
 
 from app.services.dividend import (
     DividendService,
@@ -15,6 +16,9 @@ from app.schemas.dividend import (
 )
 
 
+_DIVIDEND_RECORDS = TypeAdapter(list[DividendRecord])
+
+
 class TestDividendServiceInit:
     """Test DividendService initialization"""
     
@@ -33,46 +37,37 @@ class TestDividendServiceInit:
 class TestDividendRecordModel:
     """Test DividendRecord Pydantic model"""
     
-    def test_create_dividend_record(self):
+    @pytest.mark.parametrize("kwargs,expected", [
+        (
+            dict(
+                stock_id="2330",
+                company_name="台積電",
+                year=112,
+                quarter=1,
+                cash_dividend=3.0,
+                stock_dividend=0.0,
+                total_dividend=3.0,
+                board_resolution_date="112/05/09",
+            ),
+            dict(stock_id="2330", year=112, quarter=1, cash_dividend=3.0),
+        ),
+        (
+            # Annual dividend (no quarter)
+            dict(stock_id="2317", company_name="鴻海", year=112, quarter=None, cash_dividend=5.3),
+            dict(quarter=None),
+        ),
+        (
+            # Optional fields default to None
+            dict(stock_id="2330", company_name="台積電", year=112),
+            dict(cash_dividend=None, stock_dividend=None),
+        ),
+    ], ids=["quarterly", "annual", "optional_fields"])
+    def test_create_dividend_record(self, kwargs, expected):
         """Test creating DividendRecord model"""
-        record = DividendRecord(
-            stock_id="2330",
-            company_name="台積電",
-            year=112,
-            quarter=1,
-            cash_dividend=3.0,
-            stock_dividend=0.0,
-            total_dividend=3.0,
-            board_resolution_date="112/05/09",
-        )
+        record = DividendRecord(**kwargs)
         
-        assert record.stock_id == "2330"
-        assert record.year == 112
-        assert record.quarter == 1
-        assert record.cash_dividend == 3.0
-    
-    def test_annual_dividend(self):
-        """Test creating annual dividend record (no quarter)"""
-        record = DividendRecord(
-            stock_id="2317",
-            company_name="鴻海",
-            year=112,
-            quarter=None,  # Annual dividend
-            cash_dividend=5.3,
-        )
-        
-        assert record.quarter is None
-    
-    def test_optional_fields(self):
-        """Test that optional fields can be None"""
-        record = DividendRecord(
-            stock_id="2330",
-            company_name="台積電",
-            year=112,
-        )
-        
-        assert record.cash_dividend is None
-        assert record.stock_dividend is None
+        for field, value in expected.items():
+            assert getattr(record, field) == value
 
 
 class TestDividendSummaryModel:
@@ -94,10 +89,10 @@ class TestDividendSummaryModel:
     
     def test_quarterly_dividends_list(self):
         """Test summary with quarterly dividends"""
-        records = [
-            DividendRecord(stock_id="2330", company_name="台積電", year=112, quarter=q, cash_dividend=3.0)
+        records = _DIVIDEND_RECORDS.validate_python([
+            {"stock_id": "2330", "company_name": "台積電", "year": 112, "quarter": q, "cash_dividend": 3.0}
             for q in [1, 2, 3, 4]
-        ]
+        ])
         
         summary = DividendSummary(
             stock_id="2330",
@@ -131,26 +126,28 @@ class TestDividendResponse:
         assert response.count == 1
 
 
+@pytest.fixture(scope="module")
+def dividend_service():
+    """DividendService shared by the stateless parsing tests"""
+    return DividendService()
+
+
 class TestDividendServiceParsing:
     """Test parsing logic"""
     
-    @pytest.fixture
-    def service(self):
-        return DividendService()
-    
-    def test_extract_year(self, service):
+    def test_extract_year(self, dividend_service):
         """Test extracting year from period string"""
-        assert service._extract_year("112年10/01~112年12/31") == 112
-        assert service._extract_year("111年度") == 111
-        assert service._extract_year("No year") is None
+        assert dividend_service._extract_year("112年10/01~112年12/31") == 112
+        assert dividend_service._extract_year("111年度") == 111
+        assert dividend_service._extract_year("No year") is None
     
-    def test_extract_quarter(self, service):
+    def test_extract_quarter(self, dividend_service):
         """Test extracting quarter from period string"""
-        assert service._extract_quarter("112/01/01~112/03/31") == 1
-        assert service._extract_quarter("112/04/01~112/06/30") == 2
-        assert service._extract_quarter("112/07/01~112/09/30") == 3
-        assert service._extract_quarter("112/10/01~112/12/31") == 4
-        assert service._extract_quarter("112年度") is None
+        assert dividend_service._extract_quarter("112/01/01~112/03/31") == 1
+        assert dividend_service._extract_quarter("112/04/01~112/06/30") == 2
+        assert dividend_service._extract_quarter("112/07/01~112/09/30") == 3
+        assert dividend_service._extract_quarter("112/10/01~112/12/31") == 4
+        assert dividend_service._extract_quarter("112年度") is None
     
 
 
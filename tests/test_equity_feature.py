@@ -1,31 +1,21 @@
 
 import pytest
-import json
+import pytest_asyncio
 from decimal import Decimal
 from typing import AsyncGenerator
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, MagicMock
 
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Boolean, ForeignKey, JSON, select
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, Boolean, ForeignKey, Text, select, func, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.pool import StaticPool
 
-from fastapi.testclient import TestClient
-from app.main import app
-from app.schemas.financial import FinancialStatement, FinancialItem
+from app.schemas.financial import FinancialStatement, FinancialItem, FINANCIAL_STATEMENT_ADAPTER
 
 # ==============================================================================
 # 1. Database Access Tests (Repository Layer)
 # ==============================================================================
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
-
-def serialize_for_json(data: dict) -> dict:
-    return json.loads(json.dumps(data, cls=DecimalEncoder))
-
 # Define Local DB Models to avoid import conflicts/coupling with test_database.py
 class LocalDBBase(DeclarativeBase):
     pass
@@ -44,7 +34,7 @@ class DBFinancialReport(LocalDBBase):
     year = Column(Integer, nullable=False)
     quarter = Column(Integer, nullable=False)
     report_type = Column(String(30), nullable=False)
-    full_data = Column(JSON, nullable=True)
+    full_data = Column(Text, nullable=True)  # Raw model_dump_json() output
     is_standalone = Column(Boolean, default=False)
     company = relationship("DBCompany", back_populates="reports")
     facts = relationship("DBFinancialFact", back_populates="report", cascade="all, delete-orphan")
@@ -72,7 +62,7 @@ class InMemoryFinancialRepository:
     async def save_report(self, statement: FinancialStatement) -> int:
         await self.upsert_company(statement.stock_id, statement.company_name or f"Co {statement.stock_id}")
         
-        full_data = serialize_for_json(statement.model_dump())
+        full_data = statement.model_dump_json()
         
         report = DBFinancialReport(
             stock_id=statement.stock_id,
@@ -84,8 +74,20 @@ class InMemoryFinancialRepository:
         )
         self.session.add(report)
         await self.session.flush()
+        
+        # Bulk-insert facts in one executemany
+        facts = self._extract_facts(statement.items, report.id)
+        if facts:
+            await self.session.execute(insert(DBFinancialFact), facts)
         return report.id
 
+    def _extract_facts(self, items: list[FinancialItem], report_id: int) -> list[dict]:
+        facts = []
+        for item in items:
+            facts.append({"report_id": report_id, "concept": item.account_code, "value": item.value})
+            facts.extend(self._extract_facts(item.children, report_id))
+        return facts
+
     async def get_report(self, stock_id: str, year: int, quarter: int, report_type: str) -> FinancialStatement | None:
         result = await self.session.execute(
             select(DBFinancialReport).where(
@@ -98,24 +100,42 @@ class InMemoryFinancialRepository:
         report = result.scalar_one_or_none()
         if not report or not report.full_data:
             return None
-        return FinancialStatement.model_validate(report.full_data)
-
-@pytest.fixture
-async def db_session_local():
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+        return FINANCIAL_STATEMENT_ADAPTER.validate_json(report.full_data)
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def db_engine_local():
+    """One in-memory engine + schema for the whole session"""
+    # :memory: databases live per connection, so pin every checkout to one connection
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        echo=False,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
     async with engine.begin() as conn:
         await conn.run_sync(LocalDBBase.metadata.create_all)
-    
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
-    async with async_session() as session:
-        yield session
+    yield engine
     await engine.dispose()
 
-@pytest.fixture
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_session_local(db_engine_local):
+    """Per-test session inside an outer transaction that is rolled back on teardown"""
+    async with db_engine_local.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        yield session
+        await session.close()
+        await trans.rollback()
+
+@pytest_asyncio.fixture(loop_scope="session")
 async def repo_local(db_session_local):
     return InMemoryFinancialRepository(db_session_local)
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_db_save_and_get_equity_statement(repo_local):
     """Test saving and retrieving an Equity Statement (Database Verification)"""
     statement = FinancialStatement(
@@ -145,77 +165,79 @@ async def test_db_save_and_get_equity_statement(repo_local):
     assert retrieved.report_type == "equity_statement"
     assert retrieved.items[0].account_code == "Equity"
     assert float(retrieved.items[0].value) == 500000.0
+    
+    fact_count = await repo_local.session.scalar(
+        select(func.count()).select_from(DBFinancialFact).where(DBFinancialFact.report_id == report_id)
+    )
+    assert fact_count == 1
 
 
 # ==============================================================================
 # 2. Field Validation Tests (Router/API Layer)
 # ==============================================================================
 
-client = TestClient(app)
+def async_return(value):
+    """MagicMock whose calls return a coroutine resolving to value (calls stay tracked)"""
+    async def _coro(*args, **kwargs):
+        return value
+    return MagicMock(side_effect=_coro)
 
-def test_get_equity_statement_validation_success():
-    """Test valid parameters for equality statement"""
-    # Mock service to avoid DB/Network calls
+@pytest.fixture
+def mock_financial_service():
+    """Patch the router's service getter to avoid DB/Network calls"""
     with patch("app.routers.financial.get_financial_service") as mock_get_service:
-        mock_service = AsyncMock()
+        mock_service = MagicMock()
         mock_get_service.return_value = mock_service
-        
-        # Mock return value
-        mock_service.get_financial_statement.return_value = FinancialStatement(
-            stock_id="2330",
-            year=113,
-            quarter=3,
-            report_type="equity_statement",
-            items=[]
-        )
-        
-        response = client.get("/api/v1/financial/2330/equity-statement?year=113&quarter=3")
-        
-        assert response.status_code == 200
-        assert response.json()["report_type"] == "equity_statement"
-        
-        # Verify arguments passed to service
-        mock_service.get_financial_statement.assert_called_with(
-            stock_id="2330",
-            year=113,
-            quarter=3,
-            report_type="equity_statement",
-            format="tree"
-        )
-
-def test_get_equity_statement_validation_invalid_quarter():
-    """Test invalid quarter (must be 1-4)"""
-    response = client.get("/api/v1/financial/2330/equity-statement?year=113&quarter=5")
-    assert response.status_code == 422  # Validation Error
+        yield mock_service
 
-def test_get_equity_statement_validation_invalid_quarter_type():
-    """Test invalid quarter type"""
-    response = client.get("/api/v1/financial/2330/equity-statement?year=113&quarter=Q1")
-    assert response.status_code == 422
+def test_get_equity_statement_validation_success(client, mock_financial_service):
+    """Test valid parameters for equality statement"""
+    mock_financial_service.get_financial_statement = async_return(FinancialStatement(
+        stock_id="2330",
+        year=113,
+        quarter=3,
+        report_type="equity_statement",
+        items=[]
+    ))
+    
+    response = client.get("/api/v1/financial/2330/equity-statement?year=113&quarter=3")
+    
+    assert response.status_code == 200
+    assert response.json()["report_type"] == "equity_statement"
+    
+    # Verify arguments passed to service
+    mock_financial_service.get_financial_statement.assert_called_with(
+        stock_id="2330",
+        year=113,
+        quarter=3,
+        report_type="equity_statement",
+        format="tree"
+    )
 
-def test_get_equity_statement_validation_missing_year():
-    """Test missing required year"""
-    response = client.get("/api/v1/financial/2330/equity-statement?quarter=1")
-    assert response.status_code == 422
+@pytest.mark.parametrize("qs", [
+    "year=113&quarter=5",   # quarter must be 1-4
+    "year=113&quarter=Q1",  # quarter must be an integer
+    "quarter=1",            # year is required
+], ids=["invalid_quarter", "invalid_quarter_type", "missing_year"])
+def test_get_equity_statement_validation_error(client, qs):
+    """Test invalid query parameters are rejected"""
+    response = client.get(f"/api/v1/financial/2330/equity-statement?{qs}")
+    assert response.status_code == 422  # Validation Error
 
-def test_simplified_statement_validation_equity():
+def test_simplified_statement_validation_equity(client, mock_financial_service):
     """Test simplified statement endpoint accepts 'equity_statement'"""
-    with patch("app.routers.financial.get_financial_service") as mock_get_service:
-        mock_service = AsyncMock()
-        mock_get_service.return_value = mock_service
-        
-        mock_service.get_simplified_statement.return_value = {
-            "stock_id": "2330",
-            "year": 113,
-            "statement_type": "equity_statement",
-            "items": []
-        }
-        
-        response = client.get("/api/v1/financial/2330/simplified/equity_statement?year=113")
-        assert response.status_code == 200
-        assert response.json()["statement_type"] == "equity_statement"
+    mock_financial_service.get_simplified_statement = async_return({
+        "stock_id": "2330",
+        "year": 113,
+        "statement_type": "equity_statement",
+        "items": []
+    })
+    
+    response = client.get("/api/v1/financial/2330/simplified/equity_statement?year=113")
+    assert response.status_code == 200
+    assert response.json()["statement_type"] == "equity_statement"
 
-def test_simplified_statement_validation_invalid_type():
+def test_simplified_statement_validation_invalid_type(client):
     """Test simplified statement endpoint rejects invalid type"""
     response = client.get("/api/v1/financial/2330/simplified/invalid_type?year=113")
     assert response.status_code == 400  # Custom HTTPException
@@ -0,0 +1,57 @@
+"""
+Tests for the file-based page cache
+"""
+import math
+import os
+import time
+
+import pytest
+
+from app.utils.cache import FileCache
+
+
+class TestFileCache:
+    """Test FileCache get/set behaviour"""
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return FileCache(tmp_path / "mops")
+    
+    def test_roundtrip(self, cache):
+        """Test stored bytes are returned unchanged"""
+        payload = "<table>台積電</table>".encode("utf-8")
+        cache.set("http://example.com/a", payload)
+        
+        assert cache.get("http://example.com/a") == payload
+    
+    def test_missing_key(self, cache):
+        """Test unknown keys return None (directory not created yet)"""
+        assert cache.get("http://example.com/missing") is None
+    
+    def test_entries_are_compressed(self, cache):
+        """Test files on disk are gzip-compressed"""
+        payload = b"<tr><td>0</td></tr>" * 1000
+        cache.set("key", payload)
+        
+        (path,) = cache.directory.iterdir()
+        assert path.suffix == ".gz"
+        assert path.stat().st_size < len(payload) // 10
+    
+    def test_ttl_expiry(self, cache):
+        """Test entries older than the TTL are treated as missing"""
+        cache.set("key", b"data")
+        (path,) = cache.directory.iterdir()
+        an_hour_ago = time.time() - 3600
+        os.utime(path, (an_hour_ago, an_hour_ago))
+        
+        assert cache.get("key", ttl=60) is None
+        assert cache.get("key", ttl=7200) == b"data"
+        assert cache.get("key", ttl=math.inf) == b"data"
+    
+    def test_corrupt_entry_returns_none(self, cache):
+        """Test unreadable entries are ignored instead of raising"""
+        cache.set("key", b"data")
+        (path,) = cache.directory.iterdir()
+        path.write_bytes(b"not gzip")
+        
+        assert cache.get("key") is None
@@ -0,0 +1,100 @@
+"""
+Tests for the test-only financial statement cache
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+from app.schemas.financial import FinancialStatement, FinancialItem
+from tests.financial_cache import CachedFinancialService
+
+
+def make_statement() -> FinancialStatement:
+    return FinancialStatement(
+        stock_id="2330",
+        year=113,
+        quarter=3,
+        report_type="balance_sheet",
+        items=[
+            FinancialItem(account_code="Assets", account_name="資產總計", value=Decimal("1000")),
+        ],
+    )
+
+
+@pytest.fixture
+def inner_service():
+    service = MagicMock()
+    service.get_financial_statement = AsyncMock(side_effect=lambda **kwargs: make_statement())
+    return service
+
+
+class TestCachedFinancialService:
+    """Test CachedFinancialService"""
+    
+    @pytest.mark.asyncio
+    async def test_second_call_hits_cache(self, inner_service):
+        """Test repeated query is served without calling the underlying service"""
+        cached = CachedFinancialService(inner_service)
+        
+        first = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        second = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        
+        assert inner_service.get_financial_statement.await_count == 1
+        assert second == first
+        assert second.items[0].value == Decimal("1000")
+    
+    @pytest.mark.asyncio
+    async def test_hit_equals_miss_for_high_precision_value(self):
+        """Test a cache hit returns exactly what the miss returned"""
+        statement = make_statement()
+        statement.items[0].value = Decimal("12345678901234567.89")
+        inner = MagicMock()
+        inner.get_financial_statement = AsyncMock(return_value=statement)
+        cached = CachedFinancialService(inner)
+        
+        miss = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        hit = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        
+        assert hit == miss
+        assert hit.items[0].value == Decimal("12345678901234567.89")
+    
+    @pytest.mark.asyncio
+    async def test_returned_statement_is_independent(self):
+        """Test mutating a returned statement (miss or hit) does not affect the cache"""
+        inner = MagicMock()
+        inner.get_financial_statement = AsyncMock(return_value=make_statement())
+        cached = CachedFinancialService(inner)
+        
+        miss = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        miss.items.clear()
+        
+        hit = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        assert len(hit.items) == 1
+        hit.items.clear()
+        
+        again = await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        assert len(again.items) == 1
+    
+    @pytest.mark.asyncio
+    async def test_different_keys_miss(self, inner_service):
+        """Test different query parameters are cached separately"""
+        cached = CachedFinancialService(inner_service)
+        
+        await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        await cached.get_financial_statement("2330", 113, 3, "balance_sheet", format="flat")
+        
+        assert inner_service.get_financial_statement.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, inner_service):
+        """Test cache size is bounded"""
+        cached = CachedFinancialService(inner_service)
+        cached.MAX_ENTRIES = 2
+        
+        await cached.get_financial_statement("2330", 111, 3, "balance_sheet")
+        await cached.get_financial_statement("2330", 112, 3, "balance_sheet")
+        await cached.get_financial_statement("2330", 113, 3, "balance_sheet")
+        
+        assert len(cached._cache) == 2
+        await cached.get_financial_statement("2330", 111, 3, "balance_sheet")
+        assert inner_service.get_financial_statement.await_count == 4
@@ -3,7 +3,6 @@ Tests for Insiders Service (Share Pledging)
 """
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-import pandas as pd
 
 from app.services.insiders import (
     InsidersService,
@@ -113,36 +112,38 @@ class TestPledgingResponse:
         assert response.summary is None
 
 
+@pytest.fixture(scope="module")
+def insiders_service():
+    """InsidersService shared by the stateless parsing tests"""
+    return InsidersService()
+
+
 class TestInsidersServiceParsing:
     """Test parsing logic"""
     
-    @pytest.fixture
-    def service(self):
-        return InsidersService()
-    
-    def test_parse_int_valid(self, service):
+    def test_parse_int_valid(self, insiders_service):
         """Test parsing valid integers"""
-        assert service._parse_int("1,234,567") == 1234567
-        assert service._parse_int("1000") == 1000
-        assert service._parse_int(0) == 0
+        assert insiders_service._parse_int("1,234,567") == 1234567
+        assert insiders_service._parse_int("1000") == 1000
+        assert insiders_service._parse_int(0) == 0
     
-    def test_parse_int_invalid(self, service):
+    def test_parse_int_invalid(self, insiders_service):
         """Test parsing invalid integers"""
-        assert service._parse_int(None) is None
-        assert service._parse_int("-") is None
-        assert service._parse_int("") is None
+        assert insiders_service._parse_int(None) is None
+        assert insiders_service._parse_int("-") is None
+        assert insiders_service._parse_int("") is None
     
-    def test_parse_percentage_valid(self, service):
+    def test_parse_percentage_valid(self, insiders_service):
         """Test parsing percentage strings"""
-        assert service._parse_percentage("25.02%") == 25.02
-        assert service._parse_percentage("0.09%") == 0.09
-        assert service._parse_percentage("100%") == 100.0
+        assert insiders_service._parse_percentage("25.02%") == 25.02
+        assert insiders_service._parse_percentage("0.09%") == 0.09
+        assert insiders_service._parse_percentage("100%") == 100.0
     
-    def test_parse_percentage_invalid(self, service):
+    def test_parse_percentage_invalid(self, insiders_service):
         """Test parsing invalid percentages"""
-        assert service._parse_percentage(None) is None
-        assert service._parse_percentage("-") is None
-        assert service._parse_percentage("") is None
+        assert insiders_service._parse_percentage(None) is None
+        assert insiders_service._parse_percentage("-") is None
+        assert insiders_service._parse_percentage("") is None
 
 
 class TestCompanyNameExtraction:
@@ -154,6 +155,8 @@ class TestCompanyNameExtraction:
     
     def test_extract_company_name(self, service):
         """Test extracting company name from table"""
+        import pandas as pd
+        
         df = pd.DataFrame({0: ["2330台灣積體電路製造股份有限公司"]})
         dfs = [df]
         
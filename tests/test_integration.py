@@ -1,52 +1,94 @@
 """
 Integration Tests for Additional Crawlers
 
-Tests the full API endpoints using TestClient.
+Tests the full API endpoints using the shared async HTTP client fixture.
 """
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import orjson
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+
+from app.schemas.revenue import MonthlyRevenue
+
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-from app.main import app
 
+def json_of(response) -> dict:
+    """Decode a JSON response body with orjson (faster than response.json())"""
+    return orjson.loads(response.content)
 
-client = TestClient(app)
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def openapi_spec(async_client) -> dict:
+    """Fetch and decode the OpenAPI spec once per test session"""
+    response = await async_client.get("/openapi.json")
+    assert response.status_code == 200
+    return json_of(response)
 
 
 class TestAppStartup:
     """Test application startup"""
     
-    def test_app_root(self):
+    async def test_app_root(self, async_client):
         """Test root endpoint"""
-        response = client.get("/")
+        response = await async_client.get("/")
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
     
-    def test_health_check(self):
+    async def test_health_check(self, async_client):
         """Test health endpoint"""
-        response = client.get("/health")
+        response = await async_client.get("/health")
         assert response.status_code == 200
 
 
 class TestRevenueEndpoints:
     """Test revenue API endpoints"""
     
-    def test_revenue_endpoint_exists(self):
+    async def test_revenue_endpoint_exists(self, async_client):
         """Test that revenue endpoints are registered"""
         # This tests the endpoint exists (will fail validation but return 422)
-        response = client.get("/api/v1/revenue/monthly")
+        response = await async_client.get("/api/v1/revenue/monthly")
+        assert response.status_code == 422  # Missing required params
+    
+    async def test_all_markets_endpoint_exists(self, async_client):
+        """Test that the all-markets revenue endpoint is registered"""
+        response = await async_client.get("/api/v1/revenue/markets")
         assert response.status_code == 422  # Missing required params
     
-    def test_revenue_invalid_year(self):
+    async def test_all_markets_endpoint_returns_each_market(self, async_client):
+        """Test the all-markets endpoint wraps each market's rows and reports failures"""
+        service = MagicMock()
+        service.get_all_markets_revenue = AsyncMock(return_value=(
+            {
+                "sii": [MonthlyRevenue(stock_id="2330", company_name="台積電", year=113, month=12)],
+                "otc": [],
+            },
+            {"rotc": "No revenue data"},
+        ))
+        
+        with patch("app.routers.revenue.get_revenue_service", return_value=service):
+            response = await async_client.get(
+                "/api/v1/revenue/markets", params={"year": 113, "month": 12}
+            )
+        
+        assert response.status_code == 200
+        body = json_of(response)
+        assert [(m["market"], m["count"]) for m in body["markets"]] == [("sii", 1), ("otc", 0)]
+        assert body["failed_markets"] == {"rotc": "No revenue data"}
+    
+    async def test_revenue_invalid_year(self, async_client):
         """Test revenue with invalid year"""
-        response = client.get("/api/v1/revenue/monthly", params={
+        response = await async_client.get("/api/v1/revenue/monthly", params={
             "year": 50,  # Too low
             "month": 12,
         })
         assert response.status_code == 422
     
-    def test_revenue_invalid_month(self):
+    async def test_revenue_invalid_month(self, async_client):
         """Test revenue with invalid month"""
-        response = client.get("/api/v1/revenue/monthly", params={
+        response = await async_client.get("/api/v1/revenue/monthly", params={
             "year": 113,
             "month": 15,  # Invalid
         })
@@ -56,14 +98,14 @@ class TestRevenueEndpoints:
 class TestInsidersEndpoints:
     """Test insiders API endpoints"""
     
-    def test_pledge_endpoint_exists(self):
+    async def test_pledge_endpoint_exists(self, async_client):
         """Test that pledge endpoints are registered"""
-        response = client.get("/api/v1/insiders/pledge")
+        response = await async_client.get("/api/v1/insiders/pledge")
         assert response.status_code == 422  # Missing params
     
-    def test_pledge_path_param(self):
+    async def test_pledge_path_param(self, async_client):
         """Test pledge with path parameter"""
-        response = client.get("/api/v1/insiders/pledge/2330", params={
+        response = await async_client.get("/api/v1/insiders/pledge/2330", params={
             "year": 113,
             "month": 12,
         })
@@ -74,17 +116,17 @@ class TestInsidersEndpoints:
 class TestDividendEndpoints:
     """Test dividend API endpoints"""
     
-    def test_dividend_endpoint_exists(self):
+    async def test_dividend_endpoint_exists(self, async_client):
         """Test that dividend endpoints are registered"""
-        response = client.get("/api/v1/dividend/2330", params={
+        response = await async_client.get("/api/v1/dividend/2330", params={
             "year_start": 112,
         })
         # May timeout or return 400 if no real connection
         assert response.status_code in [200, 400, 422, 500]
     
-    def test_dividend_summary_endpoint(self):
+    async def test_dividend_summary_endpoint(self, async_client):
         """Test dividend summary endpoint"""
-        response = client.get("/api/v1/dividend/2330/summary", params={
+        response = await async_client.get("/api/v1/dividend/2330/summary", params={
             "year": 112,
         })
         assert response.status_code in [200, 400, 422, 500]
@@ -93,14 +135,14 @@ class TestDividendEndpoints:
 class TestDisclosureEndpoints:
     """Test disclosure API endpoints"""
     
-    def test_disclosure_endpoint_exists(self):
+    async def test_disclosure_endpoint_exists(self, async_client):
         """Test that disclosure endpoints are registered"""
-        response = client.get("/api/v1/disclosure")
+        response = await async_client.get("/api/v1/disclosure")
         assert response.status_code == 422  # Missing params
     
-    def test_disclosure_path_param(self):
+    async def test_disclosure_path_param(self, async_client):
         """Test disclosure with path param"""
-        response = client.get("/api/v1/disclosure/2317", params={
+        response = await async_client.get("/api/v1/disclosure/2317", params={
             "year": 112,
             "month": 12,
         })
@@ -110,28 +152,23 @@ class TestDisclosureEndpoints:
 class TestOpenAPISpec:
     """Test OpenAPI specification"""
     
-    def test_openapi_json(self):
+    async def test_openapi_json(self, openapi_spec):
         """Test that OpenAPI spec is available"""
-        response = client.get("/openapi.json")
-        assert response.status_code == 200
-        
-        spec = response.json()
-        assert "openapi" in spec
-        assert "paths" in spec
+        assert "openapi" in openapi_spec
+        assert "paths" in openapi_spec
     
-    def test_swagger_ui(self):
+    async def test_swagger_ui(self, async_client):
         """Test that Swagger UI is available"""
-        response = client.get("/docs")
+        response = await async_client.get("/docs")
         assert response.status_code == 200
     
-    def test_new_endpoints_in_spec(self):
+    async def test_new_endpoints_in_spec(self, openapi_spec):
         """Test that new endpoints are in OpenAPI spec"""
-        response = client.get("/openapi.json")
-        spec = response.json()
-        paths = spec["paths"]
+        paths = openapi_spec["paths"]
         
         # Check new endpoints exist
         assert "/api/v1/revenue/monthly" in paths
+        assert "/api/v1/revenue/markets" in paths
         assert "/api/v1/insiders/pledge/{stock_id}" in paths
         assert "/api/v1/dividend/{stock_id}" in paths
         assert "/api/v1/disclosure/{stock_id}" in paths
@@ -140,14 +177,11 @@ class TestOpenAPISpec:
 class TestRouterTags:
     """Test router tags for API organization"""
     
-    def test_tags_in_spec(self):
+    async def test_tags_in_spec(self, openapi_spec):
         """Test that tags are properly set"""
-        response = client.get("/openapi.json")
-        spec = response.json()
-        
         # Get all tags used
         tags_used = set()
-        for path_data in spec["paths"].values():
+        for path_data in openapi_spec["paths"].values():
             for method_data in path_data.values():
                 if isinstance(method_data, dict) and "tags" in method_data:
                     tags_used.update(method_data["tags"])
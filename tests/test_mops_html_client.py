@@ -1,9 +1,14 @@
 """
 Tests for MOPS HTML Client
 """
+import asyncio
+import time
+
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
+from contextlib import asynccontextmanager
+from unittest.mock import patch, MagicMock
 import pandas as pd
+from lxml import etree
 
 from app.services.mops_html_client import (
     MOPSHTMLClient,
@@ -12,6 +17,27 @@ from app.services.mops_html_client import (
     MOPSParsingError,
     get_mops_html_client,
 )
+from app.utils.cache import FileCache
+
+
+def mock_http_client(status_code: int = 200, body: bytes = b"") -> MagicMock:
+    """Stand-in for the shared httpx.AsyncClient held by MOPSHTMLClient"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.aiter_bytes = MagicMock(side_effect=AssertionError("body read on error status"))
+    
+    if status_code == 200:
+        async def aiter_bytes(chunk_size=None):
+            # Split in two to exercise chunk reassembly
+            yield body[:len(body) // 2]
+            yield body[len(body) // 2:]
+        response.aiter_bytes = aiter_bytes
+    
+    @asynccontextmanager
+    async def stream(method, url, **kwargs):
+        yield response
+    
+    return MagicMock(is_closed=False, stream=MagicMock(side_effect=stream))
 
 
 class TestMOPSHTMLClientInit:
@@ -30,6 +56,58 @@ class TestMOPSHTMLClientInit:
         assert client.rate_limit == 0.5
         assert client.max_retries == 5
     
+    @pytest.mark.asyncio
+    async def test_http_client_is_shared(self):
+        """Test the HTTP client is created once and reused"""
+        client = MOPSHTMLClient()
+        try:
+            assert client._get_client() is client._get_client()
+        finally:
+            await client.aclose()
+    
+    def test_client_usable_from_separate_event_loops(self):
+        """Test asyncio.run() twice gets a fresh HTTP client and lock per loop"""
+        client = MOPSHTMLClient(rate_limit=0)
+        
+        async def use():
+            await client._rate_limit_wait()
+            return client._get_client(), client._rate_limit_lock
+        
+        first_http, first_lock = asyncio.run(use())
+        second_http, second_lock = asyncio.run(use())
+        asyncio.run(client.aclose())
+        
+        assert second_http is not first_http
+        assert second_lock is not first_lock
+    
+    @pytest.mark.asyncio
+    async def test_aclose_releases_http_client(self):
+        """Test aclose() closes the pool and a new one is created on demand"""
+        client = MOPSHTMLClient()
+        http_client = client._get_client()
+        
+        await client.aclose()
+        
+        assert http_client.is_closed
+        assert client._client is None
+        assert client._get_client() is not http_client
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_spaces_concurrent_requests(self):
+        """Test concurrent callers are still spaced by the rate limit"""
+        client = MOPSHTMLClient(rate_limit=0.05)
+        starts = []
+        
+        async def start():
+            await client._rate_limit_wait()
+            starts.append(time.monotonic())
+        
+        await asyncio.gather(start(), start(), start())
+        
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert all(gap >= 0.04 for gap in gaps)
+    
     def test_singleton_returns_same_instance(self):
         """Test singleton pattern"""
         client1 = get_mops_html_client()
@@ -50,6 +128,12 @@ class TestMOPSHTMLClientHeaders:
         assert "Referer" in headers
         assert headers["Referer"] == client.MOPS_BASE
     
+    def test_compressed_transfer_requested(self):
+        """Test compressed responses are requested"""
+        headers = MOPSHTMLClient()._get_headers()
+        
+        assert "gzip" in headers["Accept-Encoding"]
+    
     def test_custom_referer(self):
         """Test custom referer is set"""
         client = MOPSHTMLClient()
@@ -57,6 +141,22 @@ class TestMOPSHTMLClientHeaders:
         headers = client._get_headers(referer=custom_url)
         
         assert headers["Referer"] == custom_url
+    
+    def test_default_headers_are_shared_and_read_only(self):
+        """Test the default headers are reused, not rebuilt per request"""
+        client = MOPSHTMLClient()
+        headers = client._get_headers()
+        
+        assert headers is client._get_headers()
+        with pytest.raises(TypeError):
+            headers["Referer"] = "https://example.com"
+    
+    def test_custom_referer_does_not_mutate_defaults(self):
+        """Test a custom referer leaves the shared defaults untouched"""
+        client = MOPSHTMLClient()
+        client._get_headers(referer="https://example.com")
+        
+        assert client.DEFAULT_HEADERS["Referer"] == client.MOPS_BASE
 
 
 class TestMOPSHTMLClientErrors:
@@ -108,38 +208,134 @@ class TestFetchStaticHTML:
     @pytest.mark.asyncio
     async def test_parse_html_table_success(self, client, sample_revenue_html):
         """Test successful HTML table parsing"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = sample_revenue_html
-        mock_response.encoding = "utf-8"
-        
-        with patch.object(
-            client, 
-            'fetch_static_html', 
-            new_callable=AsyncMock
-        ) as mock_fetch:
-            # Simulate what the real method would return
-            dfs = pd.read_html(sample_revenue_html)
-            mock_fetch.return_value = dfs
-            
-            result = await mock_fetch("http://example.com")
+        client._client = mock_http_client(body=sample_revenue_html.encode("big5"))
+        
+        with patch('pandas.read_html', wraps=pd.read_html) as mock_read_html:
+            result = await client.fetch_static_html("http://example.com", encoding="big5")
             
             assert len(result) == 1
             assert "公司代號" in result[0].columns or 0 in result[0].columns
+            assert mock_read_html.call_args.kwargs["flavor"] == "lxml"
+    
+    @pytest.mark.asyncio
+    async def test_static_tables_numeric_columns(self, client):
+        """Test thousands separators and dashes are handled by read_html"""
+        html = """
+        <table>
+            <tr><th>公司代號</th><th>當月營收</th></tr>
+            <tr><td>2330</td><td>200,000,000</td></tr>
+            <tr><td>2317</td><td>-</td></tr>
+        </table>
+        """
+        client._client = mock_http_client(body=html.encode("big5"))
+        
+        df = (await client.fetch_static_html("http://example.com"))[0]
+        
+        assert df["當月營收"].dtype.kind == "f"
+        assert df["當月營收"].iloc[0] == 200000000
+        assert pd.isna(df["當月營收"].iloc[1])
+    
+    def test_parse_multiple_tables(self, client):
+        """Test pages with several tables are parsed table by table"""
+        html = """
+        <html><body>
+        <table><tr><th>A</th></tr><tr><td>1</td></tr></table>
+        <table></table>
+        <table><tr><th>B</th></tr><tr><td>2</td></tr></table>
+        </body></html>
+        """
+        dfs = client._parse_tables(html)
+        
+        assert [list(df.columns) for df in dfs] == [["A"], ["B"]]
+    
+    def test_parse_no_tables_raises_value_error(self, client):
+        """Test that pages without tables raise ValueError without building a DOM"""
+        with patch('pandas.read_html') as mock_read_html:
+            with pytest.raises(ValueError):
+                client._parse_tables("<html><body><p>empty</p><p>tablet</p></body></html>")
+        
+        mock_read_html.assert_not_called()
+    
+    def test_parse_uppercase_table_tag(self, client):
+        """Test the table pre-check is case-insensitive"""
+        dfs = client._parse_tables("<HTML><TABLE class='x'><TR><TD>1</TD></TR></TABLE></HTML>")
+        assert len(dfs) == 1
+    
+    def test_page_parsed_in_one_pass(self, client):
+        """Test a well-formed page is handed to read_html once"""
+        html = """
+        <table><tr><th>A</th></tr><tr><td>1</td></tr></table>
+        <table><tr><th>B</th></tr><tr><td>2</td></tr></table>
+        """
+        with patch('pandas.read_html', wraps=pd.read_html) as mock_read_html:
+            dfs = client._parse_tables(html)
+        
+        assert len(dfs) == 2
+        assert mock_read_html.call_count == 1
+    
+    def test_lxml_failure_falls_back_to_table_chunks(self, client):
+        """Test a page lxml cannot parse whole is retried table by table with lxml"""
+        html = """
+        <html><body>
+        <table><tr><th>A</th></tr><tr><td>1</td></tr></table>
+        <table><tr><th>B</th></tr><tr><td>2</td></tr></table>
+        </body></html>
+        """
+        calls = []
+        real_read_html = pd.read_html
+        
+        def read_html_failing_on_full_page(io, **kwargs):
+            calls.append(kwargs["flavor"])
+            if len(calls) == 1:
+                raise etree.ParserError("broken")
+            return real_read_html(io, **kwargs)
+        
+        with patch('pandas.read_html', side_effect=read_html_failing_on_full_page):
+            dfs = client._parse_tables(html)
+        
+        assert [list(df.columns) for df in dfs] == [["A"], ["B"]]
+        assert set(calls) == {"lxml"}
+    
+    @pytest.mark.asyncio
+    async def test_unparseable_page_raises_parsing_error(self, client):
+        """Test a page no chunk of which parses surfaces MOPSParsingError"""
+        client._client = mock_http_client(body=b"<table></table>")
+        
+        with patch('pandas.read_html', side_effect=etree.ParserError("broken")):
+            with pytest.raises(MOPSParsingError):
+                await client.fetch_static_html("http://example.com")
+    
+    @pytest.mark.asyncio
+    async def test_file_cache_hit_skips_http(self, client, sample_revenue_html, tmp_path):
+        """Test cached pages are served without a request"""
+        client.cache = FileCache(tmp_path)
+        client._client = mock_http_client(body=sample_revenue_html.encode("big5"))
+        
+        first = await client.fetch_static_html("http://example.com", cache_ttl=3600)
+        second = await client.fetch_static_html("http://example.com", cache_ttl=3600)
+        
+        assert client._client.stream.call_count == 1
+        assert second[0].equals(first[0])
+    
+    @pytest.mark.asyncio
+    async def test_zero_ttl_refetches_and_refreshes_cache(self, client, sample_revenue_html, tmp_path):
+        """Test cache_ttl=0 bypasses the cached copy but stores the new page"""
+        client.cache = FileCache(tmp_path)
+        client._client = mock_http_client(body=sample_revenue_html.encode("big5"))
+        
+        await client.fetch_static_html("http://example.com", cache_ttl=0)
+        await client.fetch_static_html("http://example.com", cache_ttl=0)
+        
+        assert client._client.stream.call_count == 2
+        assert client.cache.get("http://example.com|big5") is not None
     
     @pytest.mark.asyncio
     async def test_data_not_found_raises_error(self, client):
         """Test that 404 raises MOPSDataNotFoundError"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 404
-            
-            mock_client_instance = AsyncMock()
-            mock_client_instance.get = AsyncMock(return_value=mock_response)
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
-            
-            with pytest.raises(MOPSDataNotFoundError):
-                await client.fetch_static_html("http://example.com/notfound")
+        client._client = mock_http_client(status_code=404)
+        
+        with pytest.raises(MOPSDataNotFoundError):
+            await client.fetch_static_html("http://example.com/notfound")
 
 
 class TestFetchHTMLTable:
@@ -152,18 +348,26 @@ class TestFetchHTMLTable:
     @pytest.mark.asyncio
     async def test_no_data_found_message(self, client):
         """Test that '查無資料' response raises MOPSDataNotFoundError"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.text = "<html>查無資料</html>"
-            mock_response.encoding = "utf-8"
-            
-            mock_client_instance = AsyncMock()
-            mock_client_instance.post = AsyncMock(return_value=mock_response)
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
-            
+        client._client = mock_http_client(body="<html>查無資料</html>".encode("utf-8"))
+        
+        with patch.object(client, '_parse_tables') as mock_parse:
             with pytest.raises(MOPSDataNotFoundError):
                 await client.fetch_html_table("ajax_test", {"param": "value"})
+        
+        mock_parse.assert_not_called()
+        
+        method, _ = client._client.stream.call_args.args
+        assert method == "POST"
+    
+    @pytest.mark.asyncio
+    async def test_http_error_status(self, client):
+        """Test non-200 status raises MOPSHTMLClientError without reading the body"""
+        client._client = mock_http_client(status_code=500)
+        
+        with pytest.raises(MOPSHTMLClientError) as exc:
+            await client.fetch_html_table("ajax_test", {"param": "value"})
+        
+        assert exc.value.status_code == 500
 
 
 class TestURLConstruction:
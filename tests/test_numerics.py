@@ -4,7 +4,10 @@ Tests for numeric parsing utilities
 import pytest
 from decimal import Decimal
 
-from app.utils.numerics import parse_financial_value, is_numeric_string
+import math
+import pandas as pd
+
+from app.utils.numerics import parse_financial_value, parse_financial_values, is_numeric_string
 
 
 class TestParseFinancialValue:
@@ -73,6 +76,64 @@ class TestParseFinancialValue:
     def test_negative_decimal(self):
         """Test negative decimal number"""
         assert parse_financial_value("-0.5") == Decimal("-0.5")
+    
+    def test_integer_fast_path_returns_int(self):
+        """Test integer strings take the int fast path"""
+        result = parse_financial_value("-1,234,567")
+        assert type(result) is int
+        assert result == -1234567
+    
+    def test_fraction_returns_decimal(self):
+        """Test strings with a decimal point stay exact as Decimal"""
+        result = parse_financial_value("0.1")
+        assert isinstance(result, Decimal)
+        assert result == Decimal("0.1")
+    
+    def test_exponent_falls_back_to_decimal(self):
+        """Test non-int numeric forms still parse via Decimal"""
+        assert parse_financial_value("1e3") == Decimal("1000")
+    
+    def test_non_ascii_input(self):
+        """Test Chinese comments are rejected and full-width digits still parse via Decimal"""
+        assert parse_financial_value("因先進製程產品需求增加所致。") is None
+        assert parse_financial_value("１２３") == Decimal("123")
+        assert parse_financial_value("１２.５") == Decimal("12.5")
+
+
+class TestParseFinancialValues:
+    """Test the batched parse_financial_values against the scalar reference"""
+    
+    CASES = [
+        "1234", "1,234,567", "-1234", "123.45", "-1,234.56", None, "", "-",
+        "—", "   ", "  1234  ", "abc", "12abc34", "123,456,789,012", "0", "-0.5",
+    ]
+    
+    def test_matches_scalar_parser(self):
+        """Test every reference case agrees with parse_financial_value"""
+        result = parse_financial_values(self.CASES)
+        
+        assert len(result) == len(self.CASES)
+        for value, parsed in zip(self.CASES, result):
+            expected = parse_financial_value(value)
+            if expected is None:
+                assert math.isnan(parsed), value
+            else:
+                assert parsed == float(expected), value
+    
+    def test_accepts_numbers(self):
+        """Test already-numeric cells pass through"""
+        assert list(parse_financial_values([278163107, 0.76])) == [278163107.0, 0.76]
+    
+    def test_numeric_series_passes_through(self):
+        """Test numeric columns from read_html skip string cleanup"""
+        result = parse_financial_values(pd.Series([1234.0, float("nan")]))
+        
+        assert result[0] == 1234.0
+        assert math.isnan(result[1])
+    
+    def test_empty_input(self):
+        """Test empty input returns an empty array"""
+        assert len(parse_financial_values([])) == 0
 
 
 class TestIsNumericString:
@@ -117,3 +178,11 @@ class TestIsNumericString:
     def test_invalid_multiple_decimals(self):
         """Test multiple decimal points returns False"""
         assert is_numeric_string("1.2.3") is False
+    
+    def test_invalid_embedded_letters(self):
+        """Test digits mixed with letters returns False"""
+        assert is_numeric_string("12a34") is False
+    
+    def test_valid_with_whitespace(self):
+        """Test surrounding whitespace is ignored"""
+        assert is_numeric_string("  1,234  ") is True
@@ -1,9 +1,14 @@
 """
 Tests for Revenue Service
 """
+import asyncio
+import math
+from datetime import date
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import pandas as pd
+from pydantic import ValidationError
 
 from app.services.revenue import (
     RevenueService,
@@ -63,6 +68,18 @@ class TestMonthlyRevenueModel:
         
         assert rev.revenue is None
         assert rev.comment is None
+    
+    def test_model_is_frozen(self):
+        """Test parsed revenues cannot be mutated after validation"""
+        rev = MonthlyRevenue(stock_id="2330", company_name="台積電", year=113, month=12)
+        
+        with pytest.raises(ValidationError):
+            rev.revenue = 1
+    
+    def test_unknown_field_rejected(self):
+        """Test misspelled fields are rejected instead of silently dropped"""
+        with pytest.raises(ValidationError):
+            MonthlyRevenue(stock_id="2330", company_name="台積電", year=113, month=12, revnue=1)
 
 
 class TestMarketRevenueResponse:
@@ -152,6 +169,81 @@ class TestRevenueServiceMocked:
         assert tsmc.company_name == "台積電"
         assert tsmc.revenue == 278163107
         assert tsmc.yoy_change == 57.77
+        assert tsmc.comment == "因先進製程產品需求增加所致。"
+
+        foxconn = next(r for r in revenues if r.stock_id == "2317")
+        assert foxconn.accumulated_revenue == 1600000000
+        assert foxconn.comment is None
+
+    def test_parse_revenue_tables_messy_values(self):
+        """Test comma separators, dashes and pre-parsed numbers"""
+        df = pd.DataFrame({
+            0: ["公司代號", "2330", "合計:"],
+            1: ["公司名稱", "台積電", ""],
+            2: ["當月營收", "278,163,107", ""],
+            3: ["上月營收", "-", ""],
+            4: ["去年當月營收", 176299866, ""],
+            5: ["上月比較增減(%)", "—", ""],
+            6: ["去年同月增減(%)", " 57.77 ", ""],
+        })
+
+        revenues = RevenueService()._parse_revenue_tables([df], year=113, month=12)
+
+        assert len(revenues) == 1
+        tsmc = revenues[0]
+        assert tsmc.revenue == 278163107
+        assert tsmc.revenue_last_month is None
+        assert tsmc.revenue_last_year == 176299866
+        assert tsmc.mom_change is None
+        assert tsmc.yoy_change == 57.77
+        # Columns beyond the table width stay unset
+        assert tsmc.accumulated_revenue is None
+        assert tsmc.comment is None
+
+    def test_parse_revenue_tables_numeric_columns(self):
+        """Test tables whose numbers and empty cells were converted by read_html"""
+        df = pd.DataFrame({
+            0: ["2330", "合計"],
+            1: ["台積電", ""],
+            2: [278163107, 1],
+            3: [float("nan"), 1.0],
+            4: [176299866, 1],
+            5: [0.76, 1.0],
+            6: [57.77, 1.0],
+            7: [2894307699, 1],
+            8: [2161735841, 1],
+            9: [33.88, 1.0],
+            10: [float("nan"), float("nan")],
+        })
+
+        revenues = RevenueService()._parse_revenue_tables([df], year=113, month=12)
+
+        assert len(revenues) == 1
+        tsmc = revenues[0]
+        assert tsmc.revenue == 278163107
+        assert tsmc.revenue_last_month is None
+        assert tsmc.yoy_change == 57.77
+        assert tsmc.comment is None
+
+    def test_invalid_rows_skipped_individually(self, sample_dfs):
+        """Test one invalid record does not discard the rest of the batch"""
+        service = RevenueService()
+        bad = {"stock_id": "9999", "company_name": "壞資料", "year": 113, "month": 12, "revenue": "abc"}
+        good = {"stock_id": "2330", "company_name": "台積電", "year": 113, "month": 12, "revenue": 1}
+        
+        with patch.object(service, "_parse_single_table", return_value=[bad, good]):
+            revenues = service._parse_revenue_tables(sample_dfs, year=113, month=12)
+        
+        assert [r.stock_id for r in revenues] == ["2330"]
+    
+    def test_cache_ttl_by_period_age(self):
+        """Test settled months are cached forever and recent ones briefly"""
+        service = RevenueService()
+        
+        assert service._cache_ttl(100, 1) == math.inf
+        
+        today = date.today()
+        assert service._cache_ttl(today.year - 1911, today.month) == service.RECENT_CACHE_TTL
     
     @pytest.mark.asyncio
     async def test_get_market_revenue_invalid_market(self):
@@ -162,3 +254,62 @@ class TestRevenueServiceMocked:
             await service.get_market_revenue(113, 12, market="invalid")
         
         assert "Invalid market" in str(exc.value)
+
+
+class TestAllMarketsRevenue:
+    """Test concurrent multi-market fetching"""
+    
+    @pytest.mark.asyncio
+    async def test_markets_fetched_concurrently(self):
+        """Test all markets are requested at once and keyed by market"""
+        service = RevenueService()
+        in_flight = 0
+        peak = 0
+        
+        async def fake_market_revenue(year, month, market, company_type, force_refresh=False):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [MonthlyRevenue(stock_id=f"{market}01", company_name=market, year=year, month=month)]
+        
+        with patch.object(service, "get_market_revenue", side_effect=fake_market_revenue):
+            result, failures = await service.get_all_markets_revenue(113, 12)
+        
+        assert failures == {}
+        assert set(result) == set(RevenueService.MARKET_TYPES)
+        assert result["otc"][0].stock_id == "otc01"
+        assert peak == len(RevenueService.MARKET_TYPES)
+    
+    @pytest.mark.asyncio
+    async def test_failed_market_is_reported(self):
+        """Test one failing market is reported without failing the whole query"""
+        service = RevenueService()
+        
+        async def fake_market_revenue(year, month, market, company_type, force_refresh=False):
+            if market == "rotc":
+                raise RevenueServiceError("No revenue data")
+            return []
+        
+        with patch.object(service, "get_market_revenue", side_effect=fake_market_revenue):
+            result, failures = await service.get_all_markets_revenue(113, 12)
+        
+        assert "rotc" not in result
+        assert len(result) == len(RevenueService.MARKET_TYPES) - 1
+        assert failures == {"rotc": "No revenue data"}
+    
+    @pytest.mark.asyncio
+    async def test_all_markets_failing_raises(self):
+        """Test an error is raised when no market succeeds"""
+        service = RevenueService()
+        
+        with patch.object(
+            service,
+            "get_market_revenue",
+            side_effect=RevenueServiceError("MOPS down"),
+        ):
+            with pytest.raises(RevenueServiceError) as exc:
+                await service.get_all_markets_revenue(113, 12)
+        
+        assert "All markets failed" in str(exc.value)